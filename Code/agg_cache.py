@@ -0,0 +1,174 @@
+"""
+On-disk cache of aggregated tables, keyed by a hash of the input store plus the metric spec
+Entries are evicted least-recently-used once the cache grows past its size cap
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import pandas as pd
+
+import agg_spec
+import card_store
+import cmc_trends
+import sql_backend
+
+
+default_cache_dir = 'Data/agg_cache'
+default_max_bytes = 200 * 1024 * 1024
+
+# bump when the engine changes in a way the spec does not capture
+cache_version = 1
+
+
+
+##
+# keys
+##
+
+# sha256 of a file's contents, read in chunks
+def file_digest(path, chunk_size = 1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return(digest.hexdigest())
+
+
+# digest of a store - a feather file, or every parquet file of a partitioned store - reusing the last
+# digest recorded for each file while its size and mtime are unchanged
+def input_digest(path, cache_dir):
+    index_path = os.path.join(cache_dir, 'digests.json')
+    index = {}
+    if os.path.exists(index_path):
+        with open(index_path) as f:
+            index = json.load(f)
+
+    digests = []
+    changed = False
+    for file in card_store.store_files(path):
+        stat = os.stat(file)
+        key = os.path.abspath(file)
+        known = index.get(key)
+        if known is None or known['size'] != stat.st_size or known['mtime_ns'] != stat.st_mtime_ns:
+            known = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'digest': file_digest(file)}
+            index[key] = known
+            changed = True
+        digests.append(os.path.relpath(file, path) + ':' + known['digest'])
+
+    if changed:
+        # written aside and moved into place, so processes digesting stores in parallel never read half an index
+        os.makedirs(cache_dir, exist_ok = True)
+        staging = index_path + '.' + str(os.getpid())
+        with open(staging, 'w') as f:
+            json.dump(index, f)
+        os.replace(staging, index_path)
+    if os.path.isfile(path):
+        return(digests[0].split(':', 1)[1])
+    return(hashlib.sha256('\n'.join(digests).encode('utf-8')).hexdigest())
+
+
+# hash of everything in agg_spec that shapes the requested tables, and of the years they cover
+def spec_digest(grain_names, years = None):
+    spec = {'version': cache_version,
+            'grains': {name: agg_spec.grains[name] for name in grain_names},
+            'metrics': agg_spec.metrics,
+            'derived': {column: inputs for column, (inputs, _) in agg_spec.derived_columns.items()},
+            'years': years}
+    return(hashlib.sha256(json.dumps(spec, sort_keys = True).encode('utf-8')).hexdigest())
+
+
+
+##
+# storage
+##
+
+# total bytes of an entry directory
+def entry_size(entry):
+    return(sum(os.path.getsize(os.path.join(entry, name)) for name in os.listdir(entry)))
+
+
+# drops least recently used entries until the cache fits in max_bytes, never the entry just written (keep)
+def evict(cache_dir, max_bytes, keep = None):
+    entries = [os.path.join(cache_dir, name) for name in os.listdir(cache_dir)
+               if os.path.isdir(os.path.join(cache_dir, name)) and os.path.join(cache_dir, name) != keep]
+    entries.sort(key = os.path.getmtime)
+    sizes = {entry: entry_size(entry) for entry in entries}
+    total = sum(sizes.values()) + (entry_size(keep) if keep is not None else 0)
+    for entry in entries:
+        if total <= max_bytes:
+            break
+        shutil.rmtree(entry, ignore_errors = True)
+        total -= sizes[entry]
+
+
+# writes an entry's tables to a staging directory, then moves it into place so readers never see half an entry
+def write_entry(entry, tables):
+    staging = entry + '.tmp'
+    shutil.rmtree(staging, ignore_errors = True)
+    os.makedirs(staging)
+    for name, table in tables.items():
+        table.reset_index().to_feather(os.path.join(staging, name + '.feather'))
+    os.replace(staging, entry)
+
+
+# reads an entry's tables back, indexed by their grain keys (aggregates hold no list columns, so pandas'
+# own feather metadata restores their dtypes exactly)
+def read_entry(entry, grain_names):
+    tables = {}
+    for name in grain_names:
+        keys = agg_spec.grains[name][0]
+        tables[name] = pd.read_feather(os.path.join(entry, name + '.feather')).set_index(keys)
+    return(tables)
+
+
+
+##
+# cached aggregation
+##
+
+# agg_spec.compute_grains over a cleaned store, served from the cache when the store and spec are unchanged
+# only the columns the grains use are read, and only the partitions of `years` (first, last) if given
+# backend: 'pandas' (agg_spec engine) or 'duckdb' (sql_backend.py) - both give the same tables, so they share entries
+def cached_grains(path, grain_names, cache_dir = default_cache_dir, max_bytes = default_max_bytes, years = None,
+                  backend = 'pandas'):
+    years = list(years) if years is not None else None
+    key = input_digest(path, cache_dir)[:16] + '-' + spec_digest(grain_names, years)[:16]
+    entry = os.path.join(cache_dir, key)
+
+    if os.path.isdir(entry):
+        now = time.time()
+        os.utime(entry, (now, now)) # marks the entry as recently used
+        return(read_entry(entry, grain_names))
+
+    if backend == 'duckdb':
+        tables = sql_backend.compute_grains(path, grain_names, years = years)
+    else:
+        cards = card_store.read_store(path, columns = agg_spec.needed_columns(grain_names),
+                                      filter = card_store.year_between(*years) if years is not None else None)
+        tables = agg_spec.compute_grains(cards, grain_names)
+    write_entry(entry, tables)
+    evict(cache_dir, max_bytes, keep = entry)
+    return(tables)
+
+
+# the tables the agg scripts and the report draw from: set (with percents), year, year_nrp and year_set_type
+# from the cleaned store, year_recent (2015-2023 partitions only) and year_first from the oracle cards
+def report_tables(store_path = 'Data/cards_cleaned', oracle_cards_path = 'Data/oracle_cards.feather',
+                  backend = 'pandas'):
+    tables = cached_grains(store_path, ['set', 'year', 'year_nrp', 'year_set_type'], backend = backend)
+    tables['set'] = agg_spec.add_percents(tables['set'])
+    tables['year_recent'] = cached_grains(store_path, ['year'], years = (2015, 2023), backend = backend)['year']
+    tables['year_first'] = cached_grains(oracle_cards_path, ['year'], backend = backend)['year']
+    tables['keyword_years'] = keyword_table(store_path)
+    return(tables)
+
+
+# cmc by year of the most printed keywords (cmc_trends.py), from the store's label columns - not cached, being
+# one groupby over a few columns
+def keyword_table(store_path = 'Data/cards_cleaned'):
+    cards = card_store.read_store(store_path, columns = cmc_trends.label_columns)
+    return(cmc_trends.top_keyword_distribution(cmc_trends.label_table(cards)))
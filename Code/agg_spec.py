@@ -0,0 +1,181 @@
+"""
+Aggregation spec shared by the set, year and non-reprint rollups: a registry of metrics and grains, and an
+engine that aggregates once at the finest grain and rolls every requested grain up from those partials
+"""
+
+import pandas as pd
+
+import instrument
+
+
+##
+# metric registry
+##
+
+# metric name -> (column, reduction) - reductions are 'sum', 'max', 'min', 'mean' and 'nunique'
+metrics = {
+    'release_date': ('released_at', 'max'),
+    'total_cards': ('name', 'nunique'),
+    'total_non_reprints': ('non_reprint', 'sum'),
+    'total_non_lands': ('nonland_spell', 'sum'),
+    'average_nonland_cmc': ('cmc', 'mean'),  # need logic to define non-land
+    'highest_nonland_cmc': ('cmc', 'max'),
+    'total_creatures': ('creature', 'sum'),
+    'total_enchantments': ('enchantment', 'sum'),
+    'total_artifacts': ('artifact', 'sum'),
+    'total_instant_sorceries': ('instant_sorcery', 'sum'),
+    'total_planeswalkers': ('planeswalker', 'sum'),
+    'total_lands': ('land', 'sum'),
+    'total_foils': ('foil', 'sum'),  # total count of cards with foil prints
+    'total_white': ('white', 'sum'),
+    'total_blue': ('blue', 'sum'),
+    'total_black': ('black', 'sum'),
+    'total_red': ('red', 'sum'),
+    'total_green': ('green', 'sum'),
+    'total_colorless': ('colorless', 'sum'),
+    'total_multicolor': ('multicolor', 'sum'),
+    'total_strictly_better': ('strictly_better', 'sum'),  # creatures improving on an earlier one (strictly_better.py)
+    'average_functions': ('n_functions', 'mean'),  # oracle text functions per card (oracle_functions.py)
+    'average_edhrec_legendaries': ('edhrec_rank', 'mean'),
+    'highest_edhrec_legendaries': ('edhrec_rank', 'max'),
+    'lowest_edhrec_legendaries': ('edhrec_rank', 'min'),
+}
+
+# the metrics every summary table carries (release date only means something per set)
+summary_metrics = [name for name in metrics if name != 'release_date']
+
+# percent-of-total-cards metrics and the count each is taken from
+percent_metrics = {
+    'percent_creatures': 'total_creatures',
+    'percent_foils': 'total_foils',
+    'percent_white': 'total_white',
+    'percent_blue': 'total_blue',
+    'percent_black': 'total_black',
+    'percent_green': 'total_green',
+    'percent_red': 'total_red',
+}
+
+# columns derived from the cleaned cards before aggregating -> (columns they are derived from, derivation)
+derived_columns = {
+    'non_reprint': (['reprint'], lambda cards: ~cards['reprint']),
+}
+
+
+
+##
+# grain registry
+##
+
+# grain name -> (group keys, bool column rows must satisfy or None, metrics)
+grains = {
+    'set': (['set'], None, ['release_date'] + summary_metrics),
+    'year': (['year'], None, summary_metrics),
+    'year_nrp': (['year'], 'non_reprint', summary_metrics),
+    'set_rarity': (['set', 'rarity'], None, summary_metrics),
+    'set_type': (['set_type'], None, summary_metrics),
+    'year_set_type': (['year', 'set_type'], None, summary_metrics),
+}
+
+
+
+##
+# engine
+##
+
+# partial reductions at the finest grain that roll up losslessly: sums, maxes, mins, and (sum, count) for means
+def partial_reductions(metric_names):
+    partials = {}
+    for name in metric_names:
+        column, reduction = metrics[name]
+        if reduction == 'mean':
+            partials[column + '__sum'] = (column, 'sum')
+            partials[column + '__count'] = (column, 'count')
+        elif reduction != 'nunique':
+            partials[column + '__' + reduction] = (column, reduction)
+    return(partials)
+
+
+# how each partial combines when rolling up
+def rollup_reduction(partial):
+    return('sum' if partial.endswith(('__sum', '__count')) else partial.rsplit('__', 1)[1])
+
+
+# cleaned-card columns the requested grains read - the rest need not be loaded
+def needed_columns(grain_names):
+    columns = []
+    for name in grain_names:
+        keys, where, names = grains[name]
+        columns += keys + ([where] if where is not None else []) + [metrics[metric][0] for metric in names]
+    columns += [column for inputs, _ in derived_columns.values() for column in inputs]
+    return([column for column in dict.fromkeys(columns) if column not in derived_columns])
+
+
+# computes the requested grains from one aggregation at the finest grain they share
+# returns {grain name: table indexed by the grain's keys}
+# missing key values form their own group at every step (dropna = False), as NULL does in SQL, so a grain's table
+# does not depend on which other grains it was computed with
+@instrument.timed()
+def compute_grains(cards, grain_names):
+    cards = cards.assign(**{column: derive(cards) for column, (_, derive) in derived_columns.items()})
+
+    wanted = [grains[name] for name in grain_names]
+    finest = list(dict.fromkeys([key for keys, where, _ in wanted for key in keys] +
+                                [where for _, where, _ in wanted if where is not None]))
+    metric_names = list(dict.fromkeys([metric for _, _, names in wanted for metric in names]))
+
+    # single scan of the card table: additive partials per finest group, plus the distinct values behind each
+    # nunique metric (nunique does not add up across groups, so it is counted from these at each grain)
+    with instrument.measure('agg_spec.partials'):
+        partials = cards.groupby(finest, observed = True, dropna = False).agg(
+            **partial_reductions(metric_names)).reset_index()
+        distinct = {column: cards[finest + [column]].drop_duplicates()
+                    for column, reduction in (metrics[name] for name in metric_names) if reduction == 'nunique'}
+    if instrument.metric_detail:
+        metric_costs(cards, finest, metric_names)
+
+    tables = {}
+    for name in grain_names:
+        with instrument.measure('agg_spec.rollup.' + name):
+            tables[name] = roll_up(name, partials, distinct)
+    return(tables)
+
+
+# one grain's table from the finest-grain partials and the distinct values behind its nunique metrics
+def roll_up(name, partials, distinct):
+    keys, where, names = grains[name]
+    rows = partials if where is None else partials[partials[where].to_numpy(dtype = bool, na_value = False)]
+    rolled = rows.groupby(keys, observed = True, dropna = False).agg(
+        **{partial: (partial, rollup_reduction(partial)) for partial in partial_reductions(names)})
+
+    table = pd.DataFrame(index = rolled.index)
+    for metric in names:
+        column, reduction = metrics[metric]
+        if reduction == 'mean':
+            table[metric] = rolled[column + '__sum'] / rolled[column + '__count']
+        elif reduction == 'nunique':
+            values = distinct[column]
+            if where is not None:
+                values = values[values[where].to_numpy(dtype = bool, na_value = False)]
+            table[metric] = values.drop_duplicates(keys + [column]).groupby(keys, observed = True,
+                                                                             dropna = False)[column].count()
+        else:
+            table[metric] = rolled[column + '__' + reduction]
+    return(table)
+
+
+# times each metric's reduction on its own at the given keys (instrument.metric_detail) - a diagnostic pass on
+# top of the shared aggregation, showing which metrics it spends its time on
+def metric_costs(cards, keys, metric_names):
+    groups = cards.groupby(keys, observed = True)
+    for name in metric_names:
+        column, reduction = metrics[name]
+        with instrument.measure('agg_spec.metric.' + name):
+            groups[column].agg(reduction)
+
+
+# adds the percent-of-total-cards metrics to a summary table
+def add_percents(table):
+    table = table.copy()
+    for percent, total in percent_metrics.items():
+        table[percent] = (table[total] / table['total_cards']) * 100
+    return(table)
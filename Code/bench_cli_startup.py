@@ -0,0 +1,49 @@
+"""
+Benchmark: start-up cost of mtg_cli.py against the scripts' up-front imports (pandas, seaborn, matplotlib),
+wall time per command plus the heaviest imports reported by python -X importtime
+Usage: python Code/bench_cli_startup.py [repeats] (from the repository root, after data_cleaning.py has run)
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+
+cli = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'mtg_cli.py')
+
+# label -> interpreter arguments
+commands = {
+    'mtg_cli --help': [cli, '--help'],
+    'mtg_cli agg (cached)': [cli, 'agg', '--table', 'year', '--rows', '1'],
+    'script imports': ['-c', 'import pandas, seaborn; from matplotlib import pyplot'],
+}
+
+
+# wall time of one run, and its -X importtime lines as (cumulative microseconds, module) for top-level imports
+def run(arguments):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime'] + arguments, check = True, capture_output = True,
+                            text = True, env = {**os.environ, 'PYTHONPATH': os.path.dirname(cli)})
+    seconds = time.perf_counter() - start
+
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, module = line[len('import time:'):].split('|')
+        if not module.startswith('  '): # nested imports are indented under their importer
+            imports.append((int(cumulative), module.strip()))
+    return(seconds, imports)
+
+
+if __name__ == '__main__':
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    for label, arguments in commands.items():
+        runs = [run(arguments) for _ in range(repeats)]
+        seconds = min(seconds for seconds, _ in runs)
+        imports = runs[-1][1]
+        print('%-22s %.3f s (best of %d), imports %.3f s' % (label + ':', seconds, repeats,
+                                                              sum(us for us, _ in imports) / 1e6))
+        for us, module in sorted(imports, reverse = True)[:5]:
+            print('    %-20s %.3f s' % (module, us / 1e6))
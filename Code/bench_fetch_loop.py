@@ -0,0 +1,65 @@
+"""
+Benchmark: assembling a 150-page pull with the original concatenate-and-print loop vs the streaming column builder
+Usage: python Code/bench_fetch_loop.py
+"""
+
+import contextlib
+import io
+import time
+import tracemalloc
+
+import pandas as pd
+
+import synthetic_cards
+from card_schema import CardTableBuilder, card_columns, to_pulled_types
+
+
+# the original data_pull.py loop, with the api call swapped for in-memory pages
+def original_loop(pages):
+    count = 1
+    datalist = list([])
+    while True:
+        data = pages[count - 1]
+        datalist = datalist + data['data']
+        print('Pulled Page ' + str(count) + ' From results')
+        cards = [data['name'] for data in data['data']]
+        print(cards)
+        if data['has_more'] == False:
+            break
+        count += 1
+    df = pd.json_normalize(datalist)
+    return(df[card_columns])
+
+
+# the streaming pipeline data_pull.py uses now
+def builder_pipeline(pages):
+    builder = CardTableBuilder()
+    for data in pages:
+        builder.add_cards(data['data'])
+    return(builder.to_frame())
+
+
+# wall time and tracemalloc peak of one call, with stdout swallowed so printing cost is kept but not shown
+def measure(function, pages):
+    tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = function(pages)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return(result, elapsed, peak)
+
+
+if __name__ == '__main__':
+    pages = synthetic_cards.make_pages(n_pages = 150)
+
+    old, old_time, old_peak = measure(original_loop, pages)
+    new, new_time, new_peak = measure(builder_pipeline, pages)
+
+    # same table either way once the original frame is cast to the pulled types
+    pd.testing.assert_frame_equal(to_pulled_types(old), new)
+
+    print('cards: ' + str(len(new)))
+    print('original loop:    %.2f s, peak %.1f MB' % (old_time, old_peak / 1e6))
+    print('builder pipeline: %.2f s, peak %.1f MB' % (new_time, new_peak / 1e6))
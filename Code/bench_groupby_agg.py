@@ -0,0 +1,86 @@
+"""
+Benchmark: set- and year-level agg with python callables (the original spec) vs agg_spec.compute_grains, the
+engine the agg scripts run (built-in reductions, one aggregation rolled up to both tables)
+Usage: python Code/bench_groupby_agg.py [n_cards] [replicas]
+"""
+
+import sys
+import time
+import warnings
+
+import pandas as pd
+
+import agg_spec
+import synthetic_cards
+
+
+# the original conditional functions
+def total_non_reprints(x):
+    return(sum(x == False))
+
+def total_non_land(x):
+    return(sum(x == True))
+
+def total_land(x):
+    return(sum(x == False))
+
+
+# the original metrics, passing builtins and python functions
+original_spec = dict(
+    total_cards = ('name', 'nunique'),
+    total_non_reprints = ('reprint', total_non_reprints),
+    total_non_lands = ('nonland_spell', total_non_land),
+    average_nonland_cmc = ('cmc', 'mean'),
+    highest_nonland_cmc = ('cmc', max),
+    total_creatures = ('creature', sum),
+    total_enchantments = ('enchantment', sum),
+    total_artifacts = ('artifact', sum),
+    total_instant_sorceries = ('instant_sorcery', sum),
+    total_planeswalkers = ('planeswalker', sum),
+    total_lands = ('nonland_spell', total_land),
+    total_foils = ('foil', sum),
+    total_white = ('white', sum),
+    total_blue = ('blue', sum),
+    total_black = ('black', sum),
+    total_red = ('red', sum),
+    total_green = ('green', sum),
+    average_edhrec_legendaries = ('edhrec_rank', 'mean'),
+    highest_edhrec_legendaries = ('edhrec_rank', max),
+    lowest_edhrec_legendaries = ('edhrec_rank', min))
+
+# set and year tables for the original spec, with wall time
+def run_original(cards, spec):
+    start = time.perf_counter()
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', FutureWarning) # builtins passed to agg warn in newer pandas
+        tables = {'set': cards.groupby('set', observed = True).agg(**spec),
+                  'year': cards.groupby('year').agg(**spec)}
+    return(tables, time.perf_counter() - start)
+
+
+# set and year tables from the production engine, with wall time
+def run_agg_spec(cards):
+    start = time.perf_counter()
+    tables = agg_spec.compute_grains(cards, ['set', 'year'])
+    return(tables, time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    n_cards = int(sys.argv[1]) if len(sys.argv) > 1 else 80000
+    replicas = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    cards = synthetic_cards.make_cleaned_table(n_cards)
+    cards = pd.concat([cards] * replicas, ignore_index = True)
+
+    # the original spec runs on numpy bools as it did before the store went arrow-backed (python functions over
+    # bool[pyarrow] groups get their counts cast back to bool)
+    numpy_bools = cards.astype({column: bool for column in cards.columns if cards[column].dtype == 'bool[pyarrow]'})
+
+    old, old_time = run_original(numpy_bools, original_spec)
+    new, new_time = run_agg_spec(cards)
+    for grain in old:
+        pd.testing.assert_frame_equal(old[grain], new[grain][list(original_spec)], check_dtype = False)
+
+    print('cards: ' + str(len(cards)) + ' (' + str(replicas) + 'x replicated)')
+    print('python callables:   %.2f s' % old_time)
+    print('agg_spec engine:    %.2f s (%.1fx)' % (new_time, old_time / new_time))
@@ -0,0 +1,68 @@
+"""
+Benchmark: data_cleaning.py's cleaning and feature extraction with the pandas steps vs the polars lazy plan,
+wall time and peak RSS, each engine in its own process, checking both give the same cleaned cards
+Usage: python Code/bench_polars_cleaning.py [n_cards]
+"""
+
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+
+# one engine's run in this process: cleans the feather at `path`, writes the result next to it and
+# reports wall time and this process's peak RSS
+def run_engine(engine, path, out_path):
+    import card_features
+    import cleaning_steps
+    import polars_cleaning
+    from card_schema import read_cards
+    if engine == 'polars':
+        import polars # imported up front like the pandas modules, so only the cleaning is timed
+
+    start = time.perf_counter()
+    if engine == 'polars':
+        cards = polars_cleaning.clean_cards(path)
+    else:
+        cards = card_features.add_features(cleaning_steps.clean_cards(read_cards(path)))
+    seconds = time.perf_counter() - start
+
+    cards.reset_index().to_feather(out_path)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+    print(json.dumps({'seconds': seconds, 'peak_rss': peak}))
+
+
+# runs an engine in a fresh interpreter, so peak RSS is that engine's alone
+def measure(engine, path, out_path):
+    output = subprocess.run([sys.executable, __file__, '--engine', engine, path, out_path],
+                            check = True, capture_output = True, text = True).stdout
+    return(json.loads(output.strip().splitlines()[-1]))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--engine':
+        run_engine(sys.argv[2], sys.argv[3], sys.argv[4])
+        sys.exit()
+
+    import synthetic_cards
+    from card_schema import read_cards
+
+    n_cards = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'cards.feather')
+        synthetic_cards.make_card_table(n_cards).to_feather(path)
+
+        results = {engine: measure(engine, path, os.path.join(folder, engine + '.feather'))
+                   for engine in ['pandas', 'polars']}
+        pd.testing.assert_frame_equal(read_cards(os.path.join(folder, 'pandas.feather')),
+                                      read_cards(os.path.join(folder, 'polars.feather')))
+
+    print('cards: ' + str(n_cards))
+    for engine, result in results.items():
+        print('%-7s %.2f s, peak rss %.0f MB' % (engine + ':', result['seconds'], result['peak_rss'] / 2 ** 20))
+    print('speedup: %.1fx' % (results['pandas']['seconds'] / results['polars']['seconds']))
@@ -0,0 +1,52 @@
+"""
+Benchmark: set/year rollups with the pandas engine (read the store, then agg_spec) vs the duckdb backend
+Usage: python Code/bench_sql_backend.py [n_cards] [replicas]
+"""
+
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+import agg_spec
+import card_store
+import sql_backend
+import synthetic_cards
+
+
+grain_names = ['set', 'year', 'year_nrp']
+
+
+def run_pandas(path):
+    start = time.perf_counter()
+    cards = card_store.read_store(path, columns = agg_spec.needed_columns(grain_names))
+    tables = agg_spec.compute_grains(cards, grain_names)
+    return(tables, time.perf_counter() - start)
+
+
+def run_duckdb(path):
+    start = time.perf_counter()
+    tables = sql_backend.compute_grains(path, grain_names)
+    return(tables, time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    n_cards = int(sys.argv[1]) if len(sys.argv) > 1 else 80000
+    replicas = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    cards = synthetic_cards.make_cleaned_table(n_cards)
+    cards = pd.concat([cards] * replicas, ignore_index = True)
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = folder + '/cards_cleaned'
+        card_store.write_store(cards, path)
+        old, old_time = run_pandas(path)
+        new, new_time = run_duckdb(path)
+
+    for grain in grain_names:
+        pd.testing.assert_frame_equal(old[grain].sort_index(), new[grain])
+
+    print('cards: ' + str(len(cards)) + ' (' + str(replicas) + 'x replicated)')
+    print('pandas engine: %.2f s' % old_time)
+    print('duckdb:        %.2f s (%.1fx)' % (new_time, old_time / new_time))
@@ -0,0 +1,178 @@
+"""
+Benchmark suite: times feather I/O, cleaning, flag extraction, oracle-function tagging, the strictly-better sweep
+and the set- and year-level aggregations on synthetic pulled tables (synthetic_cards.make_scaled_table) at
+several scales, and stores each run as a baseline (Data/benchmarks/<label>.json, an instrument.py run report)
+so runs on different commits can be compared step by step
+Usage: python Code/bench_suite.py [--scales 100k,1M,10M] [--repeats 3] [--label NAME] [--compare LABEL]
+(from the repository root - 10M printings need several GB of memory)
+"""
+
+import argparse
+import gc
+import json
+import os
+import subprocess
+import tempfile
+import time
+
+import agg_spec
+import card_features
+import cleaning_steps
+import instrument
+import oracle_functions
+import strictly_better
+import synthetic_cards
+from card_schema import read_cards
+
+
+baseline_dir = 'Data/benchmarks'
+
+
+
+##
+# steps - each takes the state of the steps before it and returns what it adds
+##
+
+# the pulled table written to feather (data_pull.py)
+def feather_write(state):
+    state['cards'].to_feather(state['path'])
+    return({})
+
+
+# the pulled table read back as arrow-backed columns (read_cards)
+def feather_read(state):
+    return({'cards': read_cards(state['path'])})
+
+
+# quality checks 3-5 (cleaning_steps.clean_cards)
+def cleaning(state):
+    return({'cleaned': cleaning_steps.clean_cards(state['cards'])})
+
+
+# type, supertype and color flags (card_features.add_features)
+def flags(state):
+    return({'featured': card_features.add_features(state['cleaned'])})
+
+
+# oracle-text function tagging, the regex pass (oracle_functions.py)
+def function_tags(state):
+    cards = state['featured'].copy()
+    cards['n_functions'] = oracle_functions.functions_per_card(cards, oracle_functions.tag_functions(cards))
+    return({'tagged': cards})
+
+
+# the strictly-better creature sweep (strictly_better.py)
+def strictly_better_sweep(state):
+    cards = state['tagged'].copy()
+    cards['strictly_better'] = strictly_better.upgrade_flags(cards, strictly_better.find_upgrades(cards))
+    return({'cleaned_cards': cards})
+
+
+# set-level table (agg_spec.py)
+def set_agg(state):
+    return({'set_tables': agg_spec.compute_grains(state['cleaned_cards'], ['set'])})
+
+
+# year-level tables, with and without reprints (agg_spec.py)
+def year_agg(state):
+    return({'year_tables': agg_spec.compute_grains(state['cleaned_cards'], ['year', 'year_nrp'])})
+
+
+# step name -> function, in the order they run
+steps = {
+    'feather_write': feather_write,
+    'feather_read': feather_read,
+    'cleaning': cleaning,
+    'flags': flags,
+    'function_tags': function_tags,
+    'strictly_better': strictly_better_sweep,
+    'set_agg': set_agg,
+    'year_agg': year_agg,
+}
+
+
+
+##
+# running
+##
+
+# '100k' -> 100000, '1M' -> 1000000
+def parse_scale(text):
+    multipliers = {'k': 10 ** 3, 'm': 10 ** 6}
+    suffix = text[-1].lower()
+    return(int(float(text[:-1]) * multipliers[suffix]) if suffix in multipliers else int(text))
+
+
+# the current commit's short hash (with -dirty for uncommitted changes), or 'local' outside a git checkout
+def commit_label():
+    try:
+        label = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], check = True, capture_output = True,
+                               text = True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], check = True,
+                               capture_output = True, text = True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return('local')
+    return(label + ('-dirty' if dirty else ''))
+
+
+# runs every step on a synthetic table of n_cards printings, best of `repeats` runs each
+# returns one record per step: {'name': '<scale>/<step>', 'seconds': best, 'runs': [...], 'rows': n_cards, ...}
+def run_scale(scale, repeats):
+    n_cards = parse_scale(scale)
+    records = []
+    with tempfile.TemporaryDirectory() as folder:
+        state = {'cards': synthetic_cards.make_scaled_table(n_cards), 'path': os.path.join(folder, 'cards.feather')}
+        for name, step in steps.items():
+            runs = []
+            for _ in range(repeats):
+                gc.collect()
+                rss_before = instrument.current_rss()
+                start = time.perf_counter()
+                added = step(state)
+                runs.append(time.perf_counter() - start)
+            rss_after = instrument.current_rss()
+            state.update(added)
+            # RSS around the last run - the lifetime peak is the whole suite's so far, earlier scales included
+            records.append({'name': scale + '/' + name, 'seconds': min(runs), 'runs': runs, 'rows': n_cards,
+                            'rss_before': rss_before, 'rss_after': rss_after,
+                            'lifetime_peak_rss': instrument.peak_rss()})
+            print('%-8s %-16s %8.3f s' % (scale, name, min(runs)))
+    return(records)
+
+
+# prints each step's time against a stored baseline, and the steps that got slower by `threshold` or more
+def compare(report, baseline_path, threshold):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    before = instrument.seconds_by_name(baseline)
+    print('\nagainst ' + baseline_path + ':')
+    for name, seconds in instrument.seconds_by_name(report).items():
+        change = '%+.0f%%' % (100 * (seconds / before[name] - 1)) if before.get(name) else 'new'
+        print('%-26s %8.3f s %8s' % (name, seconds, change))
+    slower = instrument.regressions(baseline, report, threshold)
+    print(str(len(slower)) + ' regressions (>= ' + str(threshold) + 'x): ' + ', '.join(sorted(slower)))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'benchmark the cleaning and aggregation steps at scale')
+    parser.add_argument('--scales', default = '100k,1M', help = 'comma-separated printings counts, e.g. 100k,1M,10M')
+    parser.add_argument('--repeats', type = int, default = 3)
+    parser.add_argument('--label', help = 'baseline name to store the run as (default the current commit)')
+    parser.add_argument('--compare', metavar = 'LABEL', help = 'stored baseline to compare the run against')
+    parser.add_argument('--threshold', type = float, default = 1.25, help = 'slowdown counted as a regression')
+    args = parser.parse_args()
+
+    started = time.time()
+    records = []
+    for scale in args.scales.split(','):
+        records += run_scale(scale.strip(), args.repeats)
+        gc.collect()
+
+    report = instrument.run_report(started, records)
+    report['label'] = args.label or commit_label()
+    path = os.path.join(baseline_dir, report['label'] + '.json')
+    instrument.write_report(report, path)
+    print('stored as ' + path)
+
+    if args.compare:
+        compare(report, os.path.join(baseline_dir, args.compare + '.json'), args.threshold)
@@ -0,0 +1,34 @@
+"""
+Bulk-data ingest: streams a Scryfall bulk-data file instead of paging through cards/search
+Output: dataframe with the same columns data_pull.py keeps
+"""
+
+# Documentation on Scryfall's bulk data files (oracle-cards.json mirrors the search endpoint's
+# one-printing-per-card default, default-cards.json carries every english printing):
+# https://scryfall.com/docs/api/bulk-data
+
+import instrument
+from card_schema import CardTableBuilder
+
+
+# layouts the search endpoint leaves out by default, so bulk ingest matches the paged pull
+extras_layouts = {'token', 'double_faced_token', 'emblem', 'art_series', 'vanguard', 'scheme', 'planar'}
+
+
+# yields card dictionaries one at a time from the top-level json array
+# (ijson is only needed here, so API pulls run without it)
+def iter_bulk_cards(path):
+    import ijson
+    with open(path, 'rb') as f:
+        for card in ijson.items(f, 'item', use_float = True):
+            if card.get('layout') not in extras_layouts:
+                yield card
+
+
+# reads a bulk file into a dataframe of the kept columns
+# cards are projected column by column as they are parsed, never held as a decoded card list
+@instrument.timed()
+def read_bulk_cards(path):
+    builder = CardTableBuilder()
+    builder.add_cards(iter_bulk_cards(path))
+    return(builder.to_frame())
@@ -0,0 +1,75 @@
+"""
+Feature extraction: parses type_line and colors once into compact columns stored with the cleaned cards
+Used by data_cleaning.py - the aggregation scripts read these columns instead of rescanning strings
+"""
+
+# Documentation on type lines (comprehensive rules 205):
+# https://magic.wizards.com/en/rules
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+import color_index
+import instrument
+from card_schema import arrow_values, list_contains, string_list_type
+
+
+# card types and supertypes given their own bool columns
+card_types = ['artifact', 'battle', 'creature', 'enchantment', 'instant', 'land', 'planeswalker', 'sorcery']
+supertypes = ['basic', 'legendary', 'snow', 'world']
+
+# a face's supertypes and types (everything before the dash) - faces of multi-faced cards are split by ' // '
+face_left = r'(?:^|// )[^—/]*(?:— )?'
+
+
+##
+# type line parsing
+##
+
+# splits lower-cased type lines into list columns: types (supertypes and card types) and subtypes, across all faces
+# e.g. 'legendary creature — elf warrior // land — forest' -> [legendary, creature, land], [elf, warrior, forest]
+def parse_type_lines(type_line):
+    type_line = type_line.fillna('')
+    types = type_line.str.replace(r' — [^/]*', ' ', regex = True).str.replace('//', ' ', regex = False)
+    subtypes = type_line.str.replace(face_left, ' ', regex = True)
+    return(pd.DataFrame({'types': split_words(types), 'subtypes': split_words(subtypes)}, index = type_line.index))
+
+
+# whitespace split of a string column into an arrow list column, dropping the empty pieces left by
+# leading, trailing or repeated spaces
+def split_words(text):
+    pieces = pc.utf8_split_whitespace(arrow_values(text))
+    words = pc.list_flatten(pieces)
+    keep = pc.not_equal(words, '').to_numpy(zero_copy_only = False)
+    counts = np.bincount(pc.list_parent_indices(pieces).to_numpy()[keep], minlength = len(pieces))
+    offsets = pa.array(np.concatenate([[0], np.cumsum(counts)]), type = pa.int32())
+    lists = pa.ListArray.from_arrays(offsets, words.filter(pa.array(keep)))
+    return(pd.Series(lists, index = text.index, dtype = pd.ArrowDtype(string_list_type)))
+
+
+# bool column per card type and supertype, plus the groupings the aggregation scripts count
+def type_flags(types):
+    flags = pd.DataFrame({name: list_contains(types, name) for name in card_types + supertypes})
+    flags['nonland_spell'] = ~flags['land']
+    flags['instant_sorcery'] = flags['instant'] | flags['sorcery']
+    return(flags)
+
+
+
+##
+# all features
+##
+
+# adds the parsed type lists, type flags, color and color identity masks and color flags to the cleaned cards
+@instrument.timed()
+def add_features(cards):
+    cards = cards.copy()
+    parsed = parse_type_lines(cards['type_line'])
+    cards['types'] = parsed['types']
+    cards['subtypes'] = parsed['subtypes']
+    cards = cards.join(type_flags(cards['types']))
+    cards['color_mask'] = color_index.colors_to_mask(cards['colors'])
+    cards['color_identity_mask'] = color_index.colors_to_mask(cards['color_identity'])
+    return(cards.join(color_index.color_breakdown(cards['color_mask'])))
@@ -0,0 +1,128 @@
+"""
+Card columns kept from Scryfall's card object, their arrow types, and a column-wise builder
+Shared by the paged pull, the bulk-data ingest and every script reading the feather stores
+"""
+
+# Documentation on Scryfall's Card Object:
+# https://scryfall.com/docs/api/cards
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import feather
+
+
+# relevant columns - nested fields use json_normalize's dotted naming
+card_columns = ['id', 'name', 'released_at', 'mana_cost', 'cmc',
+                'type_line', 'oracle_text', 'power',
+                'toughness', 'colors',
+                'color_identity', 'keywords',
+                'foil', 'nonfoil', 'reprint', 'set',
+                'set_name', 'set_type', 'rarity', 'artist',
+                'edhrec_rank', 'legalities.commander', 'loyalty']
+
+# key paths for each column, split once up front
+column_paths = [column.split('.') for column in card_columns]
+
+# low-cardinality text stored dictionary encoded (categorical in pandas)
+category_type = pa.dictionary(pa.int32(), pa.string())
+
+# list-valued columns
+string_list_type = pa.list_(pa.string())
+
+# arrow types of the pulled table (Data/cards.feather) - power, toughness and loyalty stay text here
+# since scryfall uses values like '*' and '1+*', data_cleaning.py makes them numeric
+pulled_types = {
+    'id': pa.string(), 'name': pa.string(), 'released_at': pa.string(), 'mana_cost': pa.string(),
+    'cmc': pa.float64(), 'type_line': pa.string(), 'oracle_text': pa.string(), 'power': pa.string(),
+    'toughness': pa.string(), 'colors': string_list_type, 'color_identity': string_list_type,
+    'keywords': string_list_type, 'foil': pa.bool_(), 'nonfoil': pa.bool_(), 'reprint': pa.bool_(),
+    'set': category_type, 'set_name': pa.string(), 'set_type': category_type, 'rarity': category_type,
+    'artist': pa.string(), 'edhrec_rank': pa.int64(), 'legalities.commander': pa.string(),
+    'loyalty': pa.string()}
+pulled_schema = pa.schema([(column, pulled_types[column]) for column in card_columns])
+
+
+
+##
+# pulling card dictionaries into columns
+##
+
+# pulls the kept columns out of one card dictionary, None where a card lacks the field
+def project_card(card):
+    row = []
+    for path in column_paths:
+        value = card
+        for key in path:
+            value = value.get(key) if isinstance(value, dict) else None
+        row.append(value)
+    return(row)
+
+
+# accumulates cards column by column as they stream in, so pages are never concatenated or normalized whole
+class CardTableBuilder:
+
+    def __init__(self):
+        self.columns = {column: [] for column in card_columns}
+
+    def add_cards(self, cards):
+        appends = [self.columns[column].append for column in card_columns]
+        for card in cards:
+            for append, value in zip(appends, project_card(card)):
+                append(value)
+
+    def __len__(self):
+        return(len(self.columns['id']))
+
+    def to_frame(self):
+        return(table_to_frame(pa.table(self.columns, schema = pulled_schema)))
+
+
+
+##
+# arrow-backed dataframes
+##
+
+# pandas dtype for each arrow type: text as string[pyarrow], dictionaries as categoricals, timestamps as
+# numpy datetimes (what matplotlib/seaborn expect), everything else (lists, nullable numbers, bools)
+# wrapped as-is in ArrowDtype
+def pandas_dtype_for(arrow_type):
+    if pa.types.is_dictionary(arrow_type) or pa.types.is_timestamp(arrow_type):
+        return(None)
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+        return(pd.StringDtype('pyarrow'))
+    return(pd.ArrowDtype(arrow_type))
+
+
+# arrow table to dataframe without copying column buffers
+def table_to_frame(table):
+    return(table.to_pandas(types_mapper = pandas_dtype_for, ignore_metadata = True))
+
+
+# recasts a frame to the pulled table's types, e.g. after concatenating frames with different categories
+def to_pulled_types(frame):
+    table = pa.Table.from_pandas(frame[card_columns], schema = pulled_schema, preserve_index = False)
+    return(table_to_frame(table))
+
+
+# reads one of the feather stores keeping its arrow types (use in place of pd.read_feather)
+def read_cards(path, columns = None):
+    return(table_to_frame(feather.read_table(path, columns = columns, memory_map = True)))
+
+
+# the arrow array behind an arrow-backed series, as one contiguous chunk
+def arrow_values(series):
+    values = pa.array(series)
+    if isinstance(values, pa.ChunkedArray):
+        values = values.combine_chunks()
+    return(values)
+
+
+# flags rows whose list column holds `value`, e.g. list_contains(cards['colors'], 'u')
+def list_contains(series, value):
+    lists = arrow_values(series)
+    hits = pc.equal(pc.list_flatten(lists), value).fill_null(False)
+    flags = np.zeros(len(lists), dtype = bool)
+    flags[pc.list_parent_indices(lists).to_numpy()[hits.to_numpy(zero_copy_only = False)]] = True
+    return(pd.Series(flags, index = series.index))
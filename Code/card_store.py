@@ -0,0 +1,93 @@
+"""
+Partitioned card store: the cleaned cards as a Hive-partitioned Parquet dataset (year=.../[set=.../]*.parquet)
+Reads push row filters down to the partition directories and row groups, and read only the requested columns
+"""
+
+import os
+import shutil
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+import instrument
+from card_schema import category_type, table_to_frame
+
+
+default_store = 'Data/cards_cleaned'
+
+# arrow type of each column the store can be partitioned by
+partition_types = {'year': pa.int32(), 'set': category_type}
+
+# parquet files per partition stay below this many rows
+max_rows_per_file = 1 << 20
+
+
+
+##
+# writing
+##
+
+# writes the cards as a dataset partitioned by `partition_by` (year, or year and set), replacing any
+# previous store only once the new one is complete
+@instrument.timed()
+def write_store(cards, path = default_store, partition_by = ('year',)):
+    table = pa.Table.from_pandas(cards, preserve_index = False)
+    partitioning = ds.partitioning(pa.schema([(column, table.schema.field(column).type) for column in partition_by]),
+                                   flavor = 'hive')
+
+    staging, previous = path + '.tmp', path + '.old'
+    shutil.rmtree(staging, ignore_errors = True)
+    ds.write_dataset(table, staging, format = 'parquet', partitioning = partitioning,
+                     max_partitions = 1 << 16, max_rows_per_file = max_rows_per_file,
+                     max_rows_per_group = min(max_rows_per_file, 1 << 16))
+
+    shutil.rmtree(previous, ignore_errors = True)
+    if os.path.exists(path):
+        os.replace(path, previous)
+    os.replace(staging, path)
+    shutil.rmtree(previous, ignore_errors = True)
+
+
+
+##
+# reading
+##
+
+# partition columns of a store, from the key=value directory names along its first path
+def partition_columns(path):
+    columns = []
+    folder = path
+    while True:
+        keyed = sorted(name for name in os.listdir(folder) if '=' in name and os.path.isdir(os.path.join(folder, name)))
+        if not keyed:
+            return(columns)
+        columns.append(keyed[0].split('=', 1)[0])
+        folder = os.path.join(folder, keyed[0])
+
+
+# every data file of a store (or the file itself), in a stable order
+def store_files(path):
+    if os.path.isfile(path):
+        return([path])
+    return(sorted(os.path.join(folder, name) for folder, _, names in os.walk(path)
+                  for name in names if name.endswith('.parquet')))
+
+
+# arrow dataset over a partitioned store, or over a single feather file (oracle_cards.feather, old stores)
+def open_store(path = default_store):
+    if os.path.isfile(path):
+        return(ds.dataset(path, format = 'feather'))
+    schema = pa.schema([(column, partition_types[column]) for column in partition_columns(path)])
+    return(ds.dataset(path, format = 'parquet', partitioning = ds.HivePartitioning.discover(schema = schema)))
+
+
+# reads the cards matching `filter` (a pyarrow.dataset expression), only `columns` if given, with the
+# same pandas types as read_cards - e.g. read_store(columns = ['name', 'cmc'], filter = year_between(2015, 2023))
+@instrument.timed()
+def read_store(path = default_store, columns = None, filter = None):
+    return(table_to_frame(open_store(path).to_table(columns = columns, filter = filter)))
+
+
+# filter expression for cards released from first_year through last_year
+def year_between(first_year, last_year):
+    return((ds.field('year') >= first_year) & (ds.field('year') <= last_year))
@@ -0,0 +1,76 @@
+"""
+Vectorized cleaning steps used by data_cleaning.py, working on the arrow-backed columns from card_schema.py
+"""
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+import instrument
+import set_metadata
+from card_schema import arrow_values, string_list_type
+
+
+# list columns that hold text
+list_columns = ['colors', 'color_identity', 'keywords']
+
+# creature and planeswalker stats - text in the pull, numeric after cleaning ('*' and '1+*' become missing)
+stat_columns = ['power', 'toughness', 'loyalty']
+
+
+# cards without a list value (e.g. double-faced cards have no top-level colors) get an empty list
+def fill_empty_lists(series):
+    lists = arrow_values(series)
+    filled = pc.if_else(lists.is_null(), pa.scalar([], type = string_list_type), lists)
+    return(pd.Series(filled, index = series.index, dtype = series.dtype))
+
+
+# lower-cases the text inside a list column with one arrow kernel over the flattened values
+def lower_lists(series):
+    lists = arrow_values(series)
+    offsets = pc.subtract(lists.offsets, lists.offsets[0])
+    lowered = pa.ListArray.from_arrays(offsets, pc.utf8_lower(lists.flatten()), mask = lists.is_null())
+    return(pd.Series(lowered, index = series.index, dtype = series.dtype))
+
+
+# lower-cases every text column with one vectorized pass per column - string columns through arrow's
+# kernel, categoricals through their (few) categories, list columns through their flattened values
+def lower_string_columns(cards):
+    cards = cards.copy()
+    for column in cards.columns:
+        dtype = cards[column].dtype
+        if isinstance(dtype, pd.StringDtype):
+            cards[column] = cards[column].str.lower()
+        elif isinstance(dtype, pd.CategoricalDtype):
+            cards[column] = cards[column].astype(pd.StringDtype('pyarrow')).str.lower().astype('category')
+        elif column in list_columns:
+            cards[column] = lower_lists(cards[column])
+    return(cards)
+
+
+# power, toughness and loyalty as nullable numbers
+def parse_stats(cards):
+    cards = cards.copy()
+    for column in stat_columns:
+        cards[column] = pd.to_numeric(cards[column], errors = 'coerce').astype('double[pyarrow]')
+    return(cards)
+
+
+# the cleaning data_cleaning.py walks through in its quality checks: excluded sets (the un-sets by default)
+# dropped by exact code, empty color lists filled, text lower-cased, release dates parsed with a year column,
+# stats made numeric - each step measured on its own (instrument.py)
+@instrument.timed()
+def clean_cards(cards, excluded = set_metadata.unset_codes):
+    with instrument.measure('cleaning_steps.drop_excluded_sets'):
+        cards = cards[~set_metadata.in_sets(cards['set'], excluded)].copy()
+    with instrument.measure('cleaning_steps.fill_empty_lists'):
+        cards['colors'] = fill_empty_lists(cards['colors'])
+    with instrument.measure('cleaning_steps.lower_string_columns'):
+        cards = lower_string_columns(cards)
+    with instrument.measure('cleaning_steps.parse_dates'):
+        cards['released_at'] = pd.to_datetime(cards['released_at'])
+        cards['year'] = cards['released_at'].dt.year
+    with instrument.measure('cleaning_steps.parse_stats'):
+        cards = parse_stats(cards)
+    cards['set'] = cards['set'].cat.remove_unused_categories()
+    return(cards)
@@ -0,0 +1,106 @@
+"""
+CMC trends per keyword and oracle-text function: explodes the keywords list column (plus the card x function
+table from oracle_functions.py) into one long card x label table, then computes every label's cmc
+distribution by year or set and its regression slope over release date with one groupby each
+Output tables are tidy (one row per label and year/set) so they plot directly with seaborn's hue
+"""
+
+import numpy as np
+import pandas as pd
+import pyarrow.compute as pc
+
+from card_schema import arrow_values
+
+
+quantiles = {'cmc_q25': 0.25, 'cmc_q75': 0.75}
+
+# card columns label_table reads (plus id when a card x function table is given)
+label_columns = ['keywords', 'nonland_spell', 'released_at', 'year', 'set', 'cmc']
+
+
+
+##
+# long card x label table
+##
+
+# categorical from an arrow string array, dictionary encoded so thousands of labels stay cheap to group on
+def to_categorical(values):
+    encoded = values.dictionary_encode()
+    return(pd.Categorical.from_codes(encoded.indices.to_numpy(zero_copy_only = False),
+                                     encoded.dictionary.to_pylist()))
+
+
+# (row, label) pairs for every keyword of every card, straight from the list column's offsets
+def keyword_labels(cards):
+    keywords = arrow_values(cards['keywords'])
+    return(pd.DataFrame({'row': pc.list_parent_indices(keywords).to_numpy(),
+                         'label': to_categorical(pc.list_flatten(keywords))}))
+
+
+# (row, label) pairs from a long id/function table, e.g. oracle_functions.tag_functions(cards[, patterns])
+def function_labels(cards, card_functions):
+    rows = pd.Index(cards['id']).get_indexer(card_functions['id'])
+    found = rows >= 0
+    return(pd.DataFrame({'row': rows[found], 'label': card_functions['function'].to_numpy()[found]}))
+
+
+# one row per card and label with what the trends group on: source ('keyword' or 'function'), label, year,
+# set, release date (as fractional years) and cmc - lands are left out by default, their cmc being 0
+def label_table(cards, card_functions = None, nonland_only = True):
+    sources = {'keyword': keyword_labels(cards)}
+    if card_functions is not None:
+        sources['function'] = function_labels(cards, card_functions)
+    pairs = pd.concat([labels.assign(source = source) for source, labels in sources.items()], ignore_index = True)
+    pairs = pairs.astype({'source': 'category', 'label': 'category'})
+
+    if nonland_only:
+        pairs = pairs[cards['nonland_spell'].to_numpy(dtype = bool, na_value = True)[pairs['row'].to_numpy()]]
+
+    rows = pairs['row'].to_numpy()
+    released_at = cards['released_at'].to_numpy()[rows]
+    return(pd.DataFrame({
+        'source': pairs['source'].to_numpy(),
+        'label': pairs['label'].to_numpy(),
+        'year': cards['year'].to_numpy()[rows],
+        'set': cards['set'].to_numpy()[rows],
+        'released_at': released_at,
+        'released_year': 1970 + released_at.astype('datetime64[D]').astype(float) / 365.25,
+        'cmc': cards['cmc'].to_numpy(dtype = float, na_value = np.nan)[rows],
+    }))
+
+
+
+##
+# trends
+##
+
+# cmc distribution per label and `by` (year or set): cards, mean, median and quartiles
+def cmc_distribution(labelled, by = 'year'):
+    grouped = labelled.groupby(['source', 'label', by], observed = True)['cmc']
+    table = grouped.agg(n_cards = 'count', mean_cmc = 'mean', median_cmc = 'median')
+    spread = grouped.quantile(list(quantiles.values())).unstack()
+    spread.columns = list(quantiles)
+    return(table.join(spread).reset_index())
+
+
+# cmc distribution by `by` of the `top` keywords on the most cards with a cmc (the keyword trend chart's table)
+def top_keyword_distribution(labelled, top = 5, by = 'year'):
+    keywords = labelled[labelled['source'] == 'keyword'].dropna(subset = ['cmc'])
+    top_labels = keywords['label'].value_counts().nlargest(top).index
+    return(cmc_distribution(keywords[keywords['label'].isin(top_labels)], by = by))
+
+
+# least-squares slope of cmc over release date per label (cmc per year), from per-label sums in one groupby
+# slope = (n sum(xy) - sum(x) sum(y)) / (n sum(xx) - sum(x)^2), with x = release year and y = cmc
+def cmc_slopes(labelled):
+    points = labelled.dropna(subset = ['cmc'])
+    x = points['released_year'] - points['released_year'].mean() # centred, keeping the sums well conditioned
+    y = points['cmc']
+    sums = pd.DataFrame({'source': points['source'], 'label': points['label'], 'n': 1, 'x': x, 'y': y,
+                         'xx': x * x, 'xy': x * y}).groupby(['source', 'label'], observed = True).sum()
+
+    spread = sums['n'] * sums['xx'] - sums['x'] ** 2
+    slopes = pd.DataFrame({'n_cards': sums['n'],
+                           'cmc_slope_per_year': (sums['n'] * sums['xy'] - sums['x'] * sums['y']) / spread.where(spread > 0)})
+    years = points.groupby(['source', 'label'], observed = True)['year'].agg(first_year = 'min', last_year = 'max')
+    return(slopes.join(years).reset_index())
@@ -0,0 +1,98 @@
+"""
+Color index: colors and color identity as wubrg bitmasks, with vectorized helpers over the masks
+"""
+
+import numpy as np
+import pandas as pd
+
+from card_schema import list_contains
+
+
+# bit for each color, wubrg order
+color_bits = {'w': 1, 'u': 2, 'b': 4, 'r': 8, 'g': 16}
+color_names = {'w': 'white', 'u': 'blue', 'b': 'black', 'r': 'red', 'g': 'green'}
+
+# named two- and three-color combinations
+guilds = {'azorius': 'wu', 'dimir': 'ub', 'rakdos': 'br', 'gruul': 'rg', 'selesnya': 'gw',
+          'orzhov': 'wb', 'izzet': 'ur', 'golgari': 'bg', 'boros': 'rw', 'simic': 'gu'}
+shards = {'bant': 'gwu', 'esper': 'wub', 'grixis': 'ubr', 'jund': 'brg', 'naya': 'rgw'}
+wedges = {'abzan': 'wbg', 'jeskai': 'urw', 'sultai': 'bgu', 'mardu': 'rwb', 'temur': 'gur'}
+
+# number of colors in each of the 32 possible masks
+popcount = np.array([bin(mask).count('1') for mask in range(32)], dtype = np.uint8)
+
+
+# mask of a color string like 'wu' or 'gwu'
+def mask_of(colors):
+    return(sum(color_bits[color] for color in set(colors)))
+
+
+
+##
+# building masks
+##
+
+# wubrg bitmask of a list column of (lower-case) color letters, e.g. colors or color_identity
+def colors_to_mask(colors):
+    mask = np.zeros(len(colors), dtype = np.uint8)
+    for color, bit in color_bits.items():
+        mask |= list_contains(colors, color).to_numpy() * np.uint8(bit)
+    return(pd.Series(mask, index = colors.index))
+
+
+
+##
+# vectorized queries over a mask column
+##
+
+# cards containing a color (possibly alongside others)
+def has_color(mask, color):
+    return((mask & color_bits[color]) > 0)
+
+
+# cards that are exactly the given colors, e.g. is_exactly(mask, guilds['izzet'])
+def is_exactly(mask, colors):
+    return(mask == mask_of(colors))
+
+
+# cards whose colors all fall within the given colors (colorless included), e.g. commander identity checks
+def within(mask, colors):
+    return((mask & ~np.uint8(mask_of(colors))) == 0)
+
+
+# number of colors per card
+def color_count(mask):
+    return(pd.Series(popcount[mask.to_numpy()], index = mask.index))
+
+
+# a bool per color plus colorless and multicolor
+def color_breakdown(mask):
+    breakdown = pd.DataFrame({color_names[color]: has_color(mask, color) for color in color_bits})
+    count = color_count(mask)
+    breakdown['colorless'] = count == 0
+    breakdown['multicolor'] = count > 1
+    return(breakdown)
+
+
+
+##
+# breakdowns per group from one count per color combination
+##
+
+# cards per group and exact color combination (columns are the 32 masks)
+def combination_counts(cards, by, mask_column = 'color_mask'):
+    counts = pd.crosstab(cards[by], cards[mask_column])
+    return(counts.reindex(columns = range(32), fill_value = 0))
+
+
+# color breakdown per group summed from combination counts - any mask predicate becomes a column selection
+def breakdown_from_combinations(counts, named = None):
+    masks = pd.Series(range(32), dtype = np.uint8)
+    breakdown = pd.DataFrame(index = counts.index)
+    for color in color_bits:
+        breakdown[color_names[color]] = counts.loc[:, has_color(masks, color).to_numpy()].sum(axis = 1)
+    breakdown['colorless'] = counts[0]
+    breakdown['multicolor'] = counts.loc[:, popcount > 1].sum(axis = 1)
+    for name, colors in (named or {}).items():
+        breakdown[name] = counts[mask_of(colors)]
+    return(breakdown)
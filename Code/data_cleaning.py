@@ -3,89 +3,171 @@
 Data-Cleaning
 """
 
-import pandas as pd 
+import os 
 
-# pulling unprocessed card data 
-cards = pd.read_feather('Data/cards.feather')
+import card_features 
+import card_store 
+import cleaning_steps 
+import oracle_cards 
+import oracle_functions 
+import polars_cleaning 
+import set_metadata 
+import strictly_better 
+from card_schema import read_cards 
 
 
+# cleaning engine: 'pandas' runs the cleaning steps below one by one, 'polars' runs the same cleaning and 
+# feature extraction as one lazy, multi-threaded plan straight from cards.feather (polars_cleaning.py) 
+engine = 'pandas'
 
-## 
-# quality check 1: duplications of cards 
-##
-
-# identify if there are any cards with multiple occurances 
-quality_check = cards.groupby(['set', 'name']).agg(Occurances = ('name', 'count'))
-quality_check.sort_values(by = 'Occurances', ascending = False)
-
-# there's 10 cards with multiple reported prints 
-dups = quality_check.query('Occurances > 1')
-dups.shape
-
-# since they all from unsets, and those aren't practical for this analysis we should filter them 
-cards_without_un= cards[~cards['set'].str.contains('ust|unh|ugl|unf|und')]
+# unprocessed pull (data_pull.py) and the cleaned, partitioned store the aggregation scripts read 
+source_path = 'Data/cards.feather'
+store_path = 'Data/cards_cleaned'
 
-# we dropped ~800 instances of cards filtering for 'unsets' 
-cards.shape[0] - cards_without_un.shape[0] 
+# derived tables written alongside the store 
+sets_path = 'Data/sets.feather'
+card_functions_path = 'Data/card_functions.feather'
+oracle_cards_path = 'Data/oracle_cards.feather'
 
-# final check on duplications of cards - we have no more duplications from the scryfall api 
-quality_check = cards_without_un.groupby(['set', 'name']).agg(Occurances = ('name', 'count'))
-dups = quality_check.query('Occurances > 1')
-dups.shape
-dups
+# sets table source: 'cards' builds it from the pull, 'scryfall' fetches Scryfall's sets endpoint (which also 
+# knows each set's parent set, so an un-set's token and promo sets are excluded with it) 
+sets_source = 'cards'
 
-# reassign cards without unset cards 
-cards = cards_without_un 
+# the un-sets are always left out - drop_funny also drops every other funny set (joke and playtest sets) 
+drop_funny = False
 
 
 
-##
-# quality check 2: missing information
 ## 
+# set metadata: which sets the analysis leaves out 
+##
 
-# identify any anomalous card name or values 
-missing_values = cards.isna().sum()
-missing_values 
+# sets table (code, name, set type, release date, card count, parent set, digital, funny flag) of the pull 
+def load_sets(cards, source = sets_source): 
+    if source == 'scryfall': 
+        return(set_metadata.fetch_sets())
+    return(set_metadata.build_sets(cards))
 
 
-# important information - name, released_at, and set, do not have any missing information 
+# set codes dropped in the checks and the cleaning, looked up in the sets table 
+def excluded_sets(sets, drop_funny = drop_funny): 
+    return(set_metadata.excluded_codes(sets, funny = drop_funny))
 
 
 
-##
-# quality check 3: colors column is a list 
 ## 
+# quality checks 1-2: duplications of cards and missing information 
+##
 
-# the colors column is a listed with the pandas dataframe - for string capturing need to 
-# convert this into a concatenated string 
-cards['colors'] = cards['colors'].apply(lambda x: ', '.join(map(str, x)) if x is not None else '')
-
+# returns the (set, name) pairs printed more than once, before and after dropping the excluded sets (the 
+# un-sets, from the sets table unless given), and the missing values per column 
+def quality_checks(cards, excluded = None): 
+    if excluded is None: 
+        excluded = excluded_sets(load_sets(cards))
 
+    # quality check 1: identify if there are any cards with multiple occurances 
+    quality_check = cards.groupby(['set', 'name'], observed = True).agg(Occurances = ('name', 'count'))
 
-##
-# quality check 4: upper-cases on string 
-##
+    # there's 10 cards with multiple reported prints 
+    dups_with_un = quality_check.query('Occurances > 1')
 
-# a good portion of strings have some upper-case and some lower case values which can be problematic in captures 
-# need to convert to lower-case 
-cards = cards.applymap(lambda x: x.lower() if isinstance(x, str) else x)
+    # since they all from unsets, and those aren't practical for this analysis we should filter them 
+    # (an exact lookup of the excluded codes on the set categories, not a pattern match that also catches codes 
+    # merely containing them) - we dropped ~800 instances of cards filtering for 'unsets' 
+    cards_without_un= cards[~set_metadata.in_sets(cards['set'], excluded)]
 
+    # final check on duplications of cards - we have no more duplications from the scryfall api 
+    quality_check = cards_without_un.groupby(['set', 'name'], observed = True).agg(Occurances = ('name', 'count'))
+    dups = quality_check.query('Occurances > 1')
 
+    # the un-set cards are dropped in the cleaning below 
 
-##
-# quality check 5: type conversions 
-## 
+    # quality check 2: missing information - identify any anomalous card name or values 
+    # important information - name, released_at, and set, do not have any missing information 
+    missing_values = cards_without_un.isna().sum()
+    return(dups_with_un, dups, missing_values)
 
-# convert release date to date type and pulling a year column 
-cards['released_at'] = pd.to_datetime(cards['released_at'])
-cards['year'] = cards['released_at'].dt.year
 
 
 ##
-# pushing processed data into feather file 
-## 
-cards = cards.reset_index() ## run this line if something funky goes on 
-cards.to_feather('Data/cards_cleaned.feather')
+# cleaning: set metadata, quality checks 3-5, feature extraction and the derived tables, written to the store 
+##
+
+# cleans the pulled cards (read from source_path unless given) and writes the sets, card functions and 
+# oracle cards tables and the partitioned store to the given paths - returns the cleaned cards 
+def clean(cards = None, engine = engine, source_path = source_path, store_path = store_path, 
+          sets_path = sets_path, card_functions_path = card_functions_path, oracle_cards_path = oracle_cards_path, 
+          sets_source = sets_source, drop_funny = drop_funny): 
+    # pulling unprocessed card data (arrow-backed columns, read zero-copy) 
+    if cards is None: 
+        cards = read_cards(source_path)
+
+    # set metadata (code, name, set type, release date, card count, funny flag) built once from the pull - set 
+    # exclusions and set-type groupings look codes up in it 
+    for path in [sets_path, card_functions_path, oracle_cards_path]: 
+        os.makedirs(os.path.dirname(path) or '.', exist_ok = True)
+    sets = load_sets(cards, sets_source)
+    sets.to_feather(sets_path)
+    excluded = excluded_sets(sets, drop_funny)
+
+    # quality check 3: the colors column is a list within the pandas dataframe - it stays an arrow list column 
+    # (flags are taken with card_schema.list_contains), cards without colors get an empty list 
+    # quality check 4: a good portion of strings have some upper-case and some lower case values which can be 
+    # problematic in captures - lower-cased column-wise on the string columns only rather than cell by cell 
+    # quality check 5: release date converted to date type with a year column, power, toughness and loyalty to 
+    # nullable numbers ('*' style values become missing), the excluded sets' cards dropped and their codes 
+    # removed from the set categories (cleaning_steps.clean_cards) 
+
+    # feature extraction: types/subtypes list columns, a bool per card type and supertype (plus nonland_spell and 
+    # instant_sorcery), a wubrg color_mask and a bool per color - the aggregation scripts read these instead of 
+    # rescanning strings (card_features.add_features) 
+    if engine == 'polars':
+        cards = polars_cleaning.clean_cards(source_path, excluded)
+    else:
+        cards = card_features.add_features(cleaning_steps.clean_cards(cards, excluded))
+
+
+    # oracle text functions: each card tagged with the ability functions its rules text performs 
+    # one combined-pattern pass per distinct oracle text, kept as a long (id, function, count) table - the 
+    # non-zero cells of the sparse card x function matrix - plus a distinct-functions count on each card 
+    card_functions = oracle_functions.tag_functions(cards)
+    cards['n_functions'] = oracle_functions.functions_per_card(cards, card_functions)
+    card_functions.to_feather(card_functions_path)
+
+
+    # strictly better creatures: first printings that improve on an earlier creature 
+    # same colors, same or lower cmc, power/toughness at least as high and a superset of keywords, found by 
+    # sweeping creatures in release order against fronts of the weakest earlier creatures (not every pair) 
+    upgrades = strictly_better.find_upgrades(cards)
+    cards['strictly_better'] = strictly_better.upgrade_flags(cards, upgrades)
+
+
+    # oracle cards: printings collapsed to one row per card at its first printing 
+    # first-printing analyses read this table (with a printings count and last printing date) instead of 
+    # rescanning every printing - per-printing tables without reprints filter on the reprint flag instead 
+    unique_cards = oracle_cards.collapse_printings(cards)
+    unique_cards.to_feather(oracle_cards_path)
+
+
+    # pushing processed data into the partitioned parquet store 
+    cards = cards.reset_index() ## run this line if something funky goes on 
+
+    # partitioned by year (Data/cards_cleaned/year=.../), so readers after a range of years only open those 
+    # partitions - pass partition_by = ('year', 'set') to also split each year by set 
+    card_store.write_store(cards, store_path)
+    return(cards)
+
+
+
+# run as a script (or from mtg_cli.py clean) - importing this module cleans nothing 
+if __name__ == '__main__': 
+    cards = read_cards(source_path)
+    dups_with_un, dups, missing_values = quality_checks(cards)
+    dups
+    missing_values 
+
+    cards = clean(cards)
+
 
 
 
@@ -6,52 +6,70 @@ Output: All Magic! The Gathering Cards pulled from Scryfall's API, stored as car
 # Documentation on Scryfall's Card Object:  
 # https://scryfall.com/docs/api/cards
 
-import requests
-import pandas as pd 
+import logging 
+import os 
+
+import bulk_ingest 
+import incremental_pull 
+import instrument 
+import scryfall_fetch 
+from card_schema import CardTableBuilder, read_cards 
       
 
-# url used for API - a general search parameter to capture all cards (CMC >= 0) is used        
-url = 'https://api.scryfall.com/cards/search?order=name&q=cmc>=0&page=' #request url for API
-
-# initializing a list to compile all individual API page pulls and a count for loop
-count = 1 #initial count used in loop 
-datalist = list([])
-
-# pulls all cards from API and prints card names each page (150 pages total as of 6/5/2023)
-while True: 
-    response = requests.get(url + str(count))
-    data = response.json() #generates dictionary from json 
-
-    if data['has_more'] == False:
-        datalist = datalist + data['data'] 
-        print('Pulled Page ' + str(count) + ' From results')
-        cards = [data['name'] for data in data['data']]
-        print(cards)
-        print('Final Page was: ' + str(count))
-        break 
-    else: 
-        datalist = datalist + data['data']
-        print('Pulled Page ' + str(count) + ' From results')
-        cards = [data['name'] for data in data['data']]
-        print(cards)
-        count += 1    
-        
-# processing json into a pandas dataframe 
-df = pd.json_normalize(datalist)
+# optional path to a Scryfall bulk-data file (e.g. Data/oracle-cards.json from https://scryfall.com/docs/api/bulk-data) 
+# when set, the file is streamed from disk instead of paging through the search endpoint 
+bulk_file = None 
+
+# when True and a previous pull is stored, only cards released since the stored watermark are pulled 
+# and merged into the store (by name, or by id for a store of every printing), instead of re-crawling every page 
+incremental = False 
+store_path = 'Data/cards.feather'
+
+# general search parameter to capture all cards (CMC >= 0), ordered by name 
+query = 'cmc>=0'
+
+# pages are fetched concurrently through one pooled session, no faster than Scryfall's ~10 requests per second 
+requests_per_second = scryfall_fetch.default_requests_per_second
 
-# subsetting to only relevant columns 
-only_good_stuff = df[['id', 'name', 'released_at', 'mana_cost', 'cmc', 
-                      'type_line', 'oracle_text', 'power', 
-                      'toughness', 'colors', 
-                      'color_identity', 'keywords',
-                      'foil', 'nonfoil', 'reprint', 'set', 
-                      'set_name', 'set_type', 'rarity', 'artist', 
-                      'edhrec_rank', 'legalities.commander', 'loyalty']]
-    
-# writing dataframe into a feather file for storage 
-only_good_stuff.to_feather('Data/cards.feather')
+# streams pages from the API straight into a column-wise table builder, in page order 
+@instrument.timed()
+def pull_cards(query): 
+    builder = CardTableBuilder()
+    progress = scryfall_fetch.PullProgress()
+    for page, data in scryfall_fetch.iter_search_pages(query, order = 'name', 
+                                                       requests_per_second = requests_per_second): 
+        builder.add_cards(data['data'])
+        progress.update(page, data)
+    return(builder.to_frame())
 
 
+# pulls the cards - from the bulk file, as a delta merged into the stored pull, or every page - and writes 
+# them to store_path 
+def pull(store_path = store_path, bulk_file = bulk_file, incremental = incremental, query = query): 
+    if bulk_file is not None: 
+        # streaming parse, projecting each card to the relevant columns as it is read 
+        only_good_stuff = bulk_ingest.read_bulk_cards(bulk_file)
+
+    elif incremental and os.path.exists(store_path): 
+        # reading the stored pull and querying only the cards released since its latest release date 
+        existing = read_cards(store_path)
+        delta = pull_cards(incremental_pull.delta_query(query, existing))
+
+        # replacing the stored printings of re-pulled card names and appending new cards 
+        logging.info('refresh: %s', incremental_pull.delta_summary(existing, delta))
+        only_good_stuff = incremental_pull.merge_cards(existing, delta)
+
+    else: 
+        # pulls all cards from API (150 pages total as of 6/5/2023)
+        only_good_stuff = pull_cards(query)
 
+    # writing dataframe into a feather file for storage 
+    only_good_stuff.to_feather(store_path)
+    return(only_good_stuff)
 
 
+# run as a script (or from mtg_cli.py pull) - importing this module pulls nothing 
+if __name__ == '__main__': 
+    # progress is logged every few pages rather than printing every card name 
+    logging.basicConfig(level = logging.INFO, format = '%(message)s')
+    only_good_stuff = pull()
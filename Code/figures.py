@@ -0,0 +1,142 @@
+"""
+Report figures: the set- and year-level charts of set_and_year_agg.py as a registry of figure name -> (input
+table, drawing function, options), so plot_report.py can render each one on its own, unattended
+"""
+
+import seaborn as sns
+from matplotlib import pyplot as plt
+
+
+# bump when a drawing function changes, so every figure is re-rendered
+figures_version = 2
+
+
+
+##
+# drawing functions - each draws one figure on the current matplotlib figure from one table
+##
+
+# one line per column (label -> column) over the table's index, or a single seaborn line when unlabelled
+def draw_lines(table, columns, x = 'year', xlabel = 'Set Year', ylabel = '', title = '', xlim = None,
+               grid = False, rotate = False):
+    sns.set_style("dark", {'axes.grid' : grid})
+    if len(columns) == 1 and None in columns:
+        sns.lineplot(data = table, x = x, y = columns[None])
+    else:
+        for label, column in columns.items():
+            plt.plot(table.index, table[column], label = label)
+        plt.legend()
+    plt.xlabel(xlabel)
+    plt.ylabel(ylabel)
+    plt.title(title)
+    if xlim is not None:
+        plt.xlim(*xlim)
+    if rotate:
+        plt.xticks(rotation = 45)
+
+
+# total cards by set release date, labelling only the first and last dates
+def draw_cards_by_set_date(table):
+    sns.set_style("dark", {'axes.grid' : False})
+    sns.lineplot(data = table, x = 'release_date', y = 'total_cards')
+    ticks = plt.gca().get_xticks()
+    plt.gca().set_xticks([ticks[0], ticks[-1]])
+    plt.gca().set_xticklabels([min(table['release_date']).date(), max(table['release_date']).date()])
+    plt.xlabel('Set Release Date')
+    plt.ylabel('Total Cards Printed')
+    plt.ylim(0, 400)
+    plt.title('Cards Printed by Set Date')
+    plt.xticks(rotation = 45)
+
+
+# average cmc by year, one line per keyword of a tidy cmc_trends table
+def draw_keyword_cmc(table):
+    sns.set_style("dark", {'axes.grid' : False})
+    table = table.assign(label = table['label'].astype(str))
+    sns.lineplot(data = table, x = 'year', y = 'mean_cmc', hue = 'label')
+    plt.xlabel('Set Year')
+    plt.ylabel('CMC')
+    plt.title('Average CMC of Non-Land Spells by Keyword and Set Year')
+    plt.xticks(rotation = 45)
+
+
+# total cards by year for the most printed set types
+def draw_set_types(table, top = 6):
+    sns.set_style("dark", {'axes.grid' : False})
+    table = table.reset_index()
+    main_types = table.groupby('set_type', observed = True)['total_cards'].sum().nlargest(top).index
+    table = table[table['set_type'].isin(main_types)]
+    table['set_type'] = table['set_type'].cat.remove_unused_categories()
+    sns.lineplot(data = table, x = 'year', y = 'total_cards', hue = 'set_type')
+    plt.xlabel('Set Year')
+    plt.ylabel('Total Cards Printed')
+    plt.title('Cards Printed by Set Type and Set Year')
+    plt.xticks(rotation = 45)
+
+
+
+##
+# registry
+##
+
+colors = {'White Cards': 'total_white', 'Blue Cards': 'total_blue', 'Red Cards': 'total_red',
+          'Green Cards': 'total_green', 'Black Cards': 'total_black'}
+card_types = {'Creatures': 'total_creatures', 'Enchantments': 'total_enchantments', 'Artifacts': 'total_artifacts',
+              'Planeswalkers': 'total_planeswalkers', 'Instants/Sorceries': 'total_instant_sorceries',
+              'Lands': 'total_lands'}
+edhrec = {'Average Rank': 'average_edhrec_legendaries', 'Highest Rank': 'highest_edhrec_legendaries'}
+
+# figure name -> (table name, drawing function, options) - tables are the ones agg_cache.report_tables builds
+figures = {
+    'cards_by_set_date': ('set', draw_cards_by_set_date, {}),
+    'cards_by_year': ('year', draw_lines, dict(
+        columns = {None: 'total_cards'}, ylabel = 'Total Cards Printed', title = 'Cards Printed by Set Date', rotate = True)),
+    'non_reprints_by_year': ('year', draw_lines, dict(
+        columns = {None: 'total_non_reprints'}, ylabel = 'Total Cards Printed', title = 'Cards Printed by Set Date',
+        rotate = True)),
+    'average_cmc_by_year': ('year', draw_lines, dict(
+        columns = {None: 'average_nonland_cmc'}, ylabel = 'CMC', title = 'Average CMC of Non-Land Spells by Set Year',
+        rotate = True)),
+    'colors_by_year': ('year', draw_lines, dict(
+        columns = colors, ylabel = 'Total Cards Released', title = 'Total Cards Printed by Color and Set Year')),
+    'colorless_multicolor_by_year': ('year', draw_lines, dict(
+        columns = {'Colorless Cards': 'total_colorless', 'Multicolor Cards': 'total_multicolor'},
+        ylabel = 'Total Cards Released', title = 'Total Colorless and Multicolor Cards Printed by Set Year')),
+    'set_types_by_year': ('year_set_type', draw_set_types, {}),
+    'strictly_better_by_year': ('year', draw_lines, dict(
+        columns = {None: 'total_strictly_better'}, ylabel = 'Total Creatures',
+        title = 'Creatures Strictly Better Than an Earlier Creature by Set Year', rotate = True)),
+    'card_types_by_year': ('year', draw_lines, dict(
+        columns = card_types, ylabel = 'Total Cards Released', title = 'Total Cards Printed by Card Type and Set Year')),
+    'card_types_recent': ('year_recent', draw_lines, dict(
+        columns = card_types, ylabel = 'Total Cards Released', xlim = (2015, 2023), grid = True,
+        title = 'Total Cards Printed by Card Type and Set Year (Recent Years)')),
+    'edhrec_by_year': ('year', draw_lines, dict(
+        columns = edhrec, ylabel = 'EDHREC Rank', xlim = (2010, 2023), grid = True,
+        title = 'Current EDHREC Rank of Legendaries by Set Year (Highest and Average)')),
+    'edhrec_by_year_nrp': ('year_nrp', draw_lines, dict(
+        columns = edhrec, ylabel = 'EDHREC Rank', xlim = (2010, 2023), grid = True,
+        title = 'Current EDHREC Rank of Cards by Set Year (Highest and Average) - Reprints Excluded')),
+    'average_cmc_by_year_nrp': ('year_nrp', draw_lines, dict(
+        columns = {None: 'average_nonland_cmc'}, ylabel = 'CMC', rotate = True,
+        title = 'Average CMC of Non-Land Spells by Set Year - Reprints Excluded')),
+    'average_cmc_by_first_printing': ('year_first', draw_lines, dict(
+        columns = {None: 'average_nonland_cmc'}, xlabel = 'First Printing Year', ylabel = 'CMC', rotate = True,
+        title = 'Average CMC of Non-Land Spells by First Printing Year')),
+    'cards_and_edhrec_nrp_recent': ('year_nrp', draw_lines, dict(
+        columns = {'Total Cards Printed': 'total_cards', 'Average EDHREC Rank': 'average_edhrec_legendaries'},
+        ylabel = 'Total Cards Released', xlim = (2015, 2023), title = 'Total Cards Printed by Card Type and Set Year')),
+    'cards_by_year_nrp_recent': ('year_nrp', draw_lines, dict(
+        columns = {None: 'total_cards'}, ylabel = 'Total Cards Printed', xlim = (2015, 2023), rotate = True,
+        title = 'Cards Printed by Set Date, Excluding Reprints and Only Recent Years')),
+    'edhrec_average_nrp_recent': ('year_nrp', draw_lines, dict(
+        columns = {None: 'average_edhrec_legendaries'}, ylabel = 'EDHREC Rank', xlim = (2015, 2023), rotate = True,
+        title = 'Average EDHREC Rank by Set Date, Excluding Reprints and Only Recent Years')),
+    'keyword_cmc_by_year': ('keyword_years', draw_keyword_cmc, {}),
+}
+
+
+# draws a registered figure on the current matplotlib figure
+def draw(name, tables):
+    table_name, function, options = figures[name]
+    function(tables[table_name], **options)
@@ -0,0 +1,54 @@
+"""
+Incremental refresh of the stored card pull: fetch only cards released since the store's watermark and merge by card
+name - the search endpoint returns one printing per card, so a reprint comes back under its new printing's id
+A store holding every printing (a default-cards bulk file) is merged by id instead, keeping its older printings
+"""
+
+import datetime
+
+import pandas as pd
+
+from card_schema import to_pulled_types
+
+
+# days re-pulled behind the watermark - picks up cards scryfall adds or corrects after a set's release date
+default_lookback_days = 30
+
+
+# latest release date in the store
+def release_watermark(cards):
+    return(pd.to_datetime(cards['released_at']).max().date())
+
+
+# narrows a search query to cards released on or after the watermark, less the lookback window
+def delta_query(query, cards, lookback_days = default_lookback_days):
+    since = release_watermark(cards) - datetime.timedelta(days = lookback_days)
+    return(query + ' date>=' + since.isoformat())
+
+
+# column a delta is merged on: 'name' for a store of one printing per card (a search-endpoint pull), 'id' for a
+# store with several printings of a card (a bulk file of every printing), whose other printings must stay
+def merge_key(existing):
+    return('name' if existing['name'].is_unique else 'id')
+
+
+# merges freshly pulled cards into the store by merge_key - by name, pulled rows replace every stored row of the
+# same card, so a reprint's new printing replaces the old one instead of sitting beside it (as in a full pull);
+# by id, they replace the same printing and new printings are added
+# (recast afterwards since concatenating categoricals with different categories falls back to object)
+def merge_cards(existing, delta):
+    if len(delta) == 0:
+        return(existing)
+    key = merge_key(existing)
+    kept = existing[~existing[key].isin(delta[key]).to_numpy(dtype = bool, na_value = False)]
+    merged = to_pulled_types(pd.concat([kept, delta], ignore_index = True))
+    return(merged.sort_values(by = 'name', kind = 'stable', ignore_index = True))
+
+
+# counts of new and replaced cards (by merge_key) and any sets the store had not seen, for reporting a refresh
+def delta_summary(existing, delta):
+    key = merge_key(existing)
+    known = delta[key].isin(existing[key]).to_numpy(dtype = bool, na_value = False)
+    return({'new_cards': int((~known).sum()),
+            'updated_cards': int(known.sum()),
+            'new_sets': sorted(set(delta['set']) - set(existing['set']))})
@@ -0,0 +1,221 @@
+"""
+Instrumentation: timers with memory tracking (tracemalloc peaks, RSS) around pipeline stages, cleaning steps and
+aggregations, collected into a JSON run report, with an optional cProfile or pyinstrument dump per stage
+Off until enable() is called - instrumented functions then cost one flag check
+Usage: python Code/instrument.py old_report.json new_report.json [threshold] (compares two runs)
+"""
+
+import cProfile
+import functools
+import json
+import os
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+enabled = False
+
+# measurements of this process: one dict per measured block, in the order they finished
+records = []
+
+# folder profiles are dumped into (None for no profiles), and 'cprofile' or 'pyinstrument'
+profile_dir = None
+profiler = 'cprofile'
+
+# names measured with a profile dump - stages only by default, since profilers do not nest
+profiled = ()
+
+# when True, agg_spec times each metric's reduction on its own after the shared aggregation
+metric_detail = False
+
+# open measurements, innermost last: [name, tracemalloc peak seen by finished children]
+stack = []
+
+
+
+##
+# switching on
+##
+
+# starts collecting measurements (clearing earlier ones) - trace_memory adds tracemalloc peaks, at a cost of
+# roughly 2x on allocation-heavy code
+def enable(trace_memory = False, profile_to = None, profile_with = 'cprofile', profile_names = (), metrics = False):
+    global enabled, profile_dir, profiler, profiled, metric_detail
+    enabled = True
+    profile_dir = profile_to
+    profiler = profile_with
+    profiled = tuple(profile_names)
+    metric_detail = metrics
+    records.clear()
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif not trace_memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+# stops collecting (the records stay) and stops memory tracing
+def disable():
+    global enabled
+    enabled = False
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+# this process's peak resident set size in bytes over its whole life, not any one block's (ru_maxrss is in
+# kilobytes on linux, bytes on macOS)
+def peak_rss():
+    return(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024))
+
+
+# this process's resident set size now in bytes, from /proc (None where there is no /proc, e.g. macOS)
+def current_rss():
+    try:
+        with open('/proc/self/statm') as f:
+            return(int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE'))
+    except (OSError, ValueError, IndexError):
+        return(None)
+
+
+
+##
+# measuring
+##
+
+# a profiler dumping to profile_dir/<name>.prof (cProfile) or .html (pyinstrument) once stopped
+def start_profile(name):
+    if profiler == 'pyinstrument':
+        import pyinstrument
+        profile = pyinstrument.Profiler()
+        profile.start()
+        return(profile)
+    profile = cProfile.Profile()
+    profile.enable()
+    return(profile)
+
+
+# stops a profiler and writes its dump, returning the dump's path
+def stop_profile(name, profile):
+    os.makedirs(profile_dir, exist_ok = True)
+    if profiler == 'pyinstrument':
+        profile.stop()
+        path = os.path.join(profile_dir, name + '.html')
+        with open(path, 'w') as f:
+            f.write(profile.output_html())
+    else:
+        profile.disable()
+        path = os.path.join(profile_dir, name + '.prof')
+        profile.dump_stats(path)
+    return(path)
+
+
+# times the block as `name`: wall and cpu seconds, this process's RSS before and after it and its lifetime peak
+# RSS (which an earlier block in the same process may have set), and with memory tracing on, the peak traced
+# memory above what was allocated when it started - nested blocks record their parent
+@contextmanager
+def measure(name):
+    if not enabled:
+        yield
+        return
+
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        start_memory, peak = tracemalloc.get_traced_memory()
+        if stack:
+            stack[-1][1] = max(stack[-1][1], peak) # the parent's peak so far, before it is reset
+        tracemalloc.reset_peak()
+    parent = stack[-1][0] if stack else None
+    stack.append([name, 0])
+    profile = start_profile(name) if profile_dir is not None and name in profiled else None
+    rss_before = current_rss()
+    start, start_cpu = time.perf_counter(), time.process_time()
+
+    try:
+        yield
+    finally:
+        record = {'name': name, 'parent': parent, 'pid': os.getpid(),
+                  'seconds': time.perf_counter() - start, 'cpu_seconds': time.process_time() - start_cpu}
+        if profile is not None:
+            record['profile'] = stop_profile(name, profile)
+        _, children_peak = stack.pop()
+        if tracing:
+            peak = max(children_peak, tracemalloc.get_traced_memory()[1])
+            record['peak_traced'] = peak - start_memory
+            if stack:
+                stack[-1][1] = max(stack[-1][1], peak)
+        record.update(rss_before = rss_before, rss_after = current_rss(), lifetime_peak_rss = peak_rss())
+        records.append(record)
+
+
+# decorator measuring every call of a function, as `name` (module.function by default)
+def timed(name = None):
+    def decorate(function):
+        label = name or function.__module__ + '.' + function.__name__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return(function(*args, **kwargs))
+            with measure(label):
+                return(function(*args, **kwargs))
+        return(wrapper)
+    return(decorate)
+
+
+
+##
+# reports
+##
+
+# the run report: when and where it ran, and every measurement (of this process plus any passed in from workers)
+def run_report(started, extra_records = ()):
+    return({'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(started)),
+            'seconds': time.time() - started,
+            'python': platform.python_version(), 'platform': platform.platform(), 'cpu_count': os.cpu_count(),
+            'argv': sys.argv, 'lifetime_peak_rss': peak_rss(),
+            'records': list(extra_records) + records})
+
+
+# writes a run report as JSON
+def write_report(report, path):
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok = True)
+    with open(path, 'w') as f:
+        json.dump(report, f, indent = 1)
+
+
+# total seconds per measured name (names measured more than once are summed)
+def seconds_by_name(report):
+    totals = {}
+    for record in report['records']:
+        totals[record['name']] = totals.get(record['name'], 0) + record['seconds']
+    return(totals)
+
+
+# names at least `threshold` times slower in the new report than the old one, as name -> (old, new) seconds,
+# ignoring blocks under min_seconds in both runs
+def regressions(old, new, threshold = 1.25, min_seconds = 0.05):
+    old_seconds, new_seconds = seconds_by_name(old), seconds_by_name(new)
+    return({name: (old_seconds[name], seconds) for name, seconds in new_seconds.items()
+            if name in old_seconds and max(old_seconds[name], seconds) >= min_seconds and
+            seconds >= threshold * old_seconds[name]})
+
+
+if __name__ == '__main__':
+    with open(sys.argv[1]) as f:
+        old = json.load(f)
+    with open(sys.argv[2]) as f:
+        new = json.load(f)
+    threshold = float(sys.argv[3]) if len(sys.argv) > 3 else 1.25
+
+    old_seconds = seconds_by_name(old)
+    for name, seconds in sorted(seconds_by_name(new).items(), key = lambda item: -item[1]):
+        before = old_seconds.get(name)
+        change = '' if not before else '%+.0f%%' % (100 * (seconds / before - 1))
+        print('%-45s %8.3f s %8s' % (name, seconds, change))
+    slower = regressions(old, new, threshold)
+    print(str(len(slower)) + ' regressions (>= ' + str(threshold) + 'x): ' + ', '.join(sorted(slower)))
@@ -0,0 +1,159 @@
+"""
+Command line entry point for the pipeline: pull, clean, agg, plot and refresh subcommands
+Only argparse is imported up front - each subcommand imports what it runs (pandas for agg, matplotlib and seaborn
+for plot only), so `--help` or an agg served from the cache starts in a fraction of the scripts' import time
+Usage: python Code/mtg_cli.py {pull,clean,agg,plot,refresh} [options] (from the repository root)
+"""
+
+import argparse
+import os
+
+
+# tables agg can print (agg_cache.report_tables)
+table_names = ['set', 'year', 'year_nrp', 'year_set_type', 'year_recent', 'year_first', 'keyword_years']
+
+# scripts plot --script runs as they are, with their interactive plt.show() windows
+plot_scripts = ['set_level_agg', 'set_and_year_agg']
+
+
+
+##
+# subcommands
+##
+
+# data_pull.py: pulls the cards from Scryfall (or a bulk file) into the pull store
+def run_pull(args):
+    import data_pull
+    options = {'store_path': args.store, 'bulk_file': args.bulk_file, 'query': args.query}
+    cards = data_pull.pull(incremental = args.incremental,
+                           **{name: value for name, value in options.items() if value is not None})
+    print('pulled ' + str(len(cards)) + ' cards')
+
+
+# data_cleaning.py: cleans the pull and writes the cleaned store and derived tables
+def run_clean(args):
+    import data_cleaning
+    from card_schema import read_cards
+    cards = read_cards(data_cleaning.source_path)
+    if args.checks:
+        excluded = data_cleaning.excluded_sets(data_cleaning.load_sets(cards), drop_funny = args.drop_funny)
+        dups_with_un, dups, missing_values = data_cleaning.quality_checks(cards, excluded)
+        print('duplicated printings: ' + str(len(dups_with_un)) + ' (' + str(len(dups)) + ' without the un-sets)')
+        print('missing values:\n' + missing_values[missing_values > 0].to_string())
+    cards = data_cleaning.clean(cards, engine = args.engine, drop_funny = args.drop_funny)
+    print('cleaned ' + str(len(cards)) + ' cards into ' + data_cleaning.store_path)
+
+
+# the set- and year-level tables of set_level_agg.py and set_and_year_agg.py, from the agg cache
+def run_agg(args):
+    import pandas as pd
+    import agg_cache
+    tables = agg_cache.report_tables(backend = args.backend)
+    pd.set_option('display.max_columns', None)
+    for name in args.table or table_names:
+        if args.csv:
+            os.makedirs(args.csv, exist_ok = True)
+            tables[name].to_csv(os.path.join(args.csv, name + '.csv'))
+        else:
+            print(name + ':')
+            print(tables[name].head(args.rows))
+
+
+# the report figures, rendered headless by plot_report.py - or one of the agg scripts with its plot windows
+def run_plot(args):
+    if args.script:
+        import runpy
+        runpy.run_path(os.path.join(os.path.dirname(os.path.abspath(__file__)), args.script + '.py'),
+                       run_name = '__main__')
+        return
+    import agg_cache
+    import figures
+    import plot_report
+    tables = agg_cache.report_tables(backend = args.backend)
+    rendered = plot_report.build_report(tables, force = args.force, workers = args.workers or plot_report.workers)
+    print('rendered ' + str(len(rendered)) + ' of ' + str(len(figures.figures)) + ' figures into ' +
+          plot_report.report_dir)
+
+
+
+# pipeline_dag.py: reruns only the stale stages of the whole pipeline, independent ones in parallel
+def run_refresh(args):
+    import pipeline_dag
+    measure_options = {'trace_memory': args.trace_memory, 'profile_to': args.profile, 'metrics': args.metrics}
+    ran = pipeline_dag.run_pipeline(args.stage or None, force = args.force, measure_options = measure_options)
+    print('ran ' + str(len(ran)) + ' stages: ' + (', '.join(ran) or 'all fresh'))
+
+
+
+##
+# arguments
+##
+
+# one subparser per subcommand, each pointing at its run_ function
+def make_parser():
+    parser = argparse.ArgumentParser(prog = 'mtg_cli', description = 'Magic: The Gathering power creep pipeline')
+    parser.add_argument('--report', metavar = 'PATH', help = 'write a JSON timing report of the command (instrument.py)')
+    parser.add_argument('--trace-memory', action = 'store_true', help = 'add tracemalloc peaks to the report')
+    parser.add_argument('--profile', metavar = 'DIR', help = 'dump a cProfile of the command (of each stage for refresh)')
+    parser.add_argument('--metrics', action = 'store_true', help = 'time each aggregation metric on its own')
+    commands = parser.add_subparsers(dest = 'command', required = True)
+
+    pull = commands.add_parser('pull', help = 'pull cards from Scryfall into Data/cards.feather')
+    pull.add_argument('--bulk-file', help = 'stream a Scryfall bulk-data file instead of paging the API')
+    pull.add_argument('--incremental', action = 'store_true', help = 'only pull cards released since the stored pull')
+    pull.add_argument('--query', help = 'Scryfall search query (default cmc>=0)')
+    pull.add_argument('--store', help = 'pull store path (default Data/cards.feather)')
+    pull.set_defaults(run = run_pull)
+
+    clean = commands.add_parser('clean', help = 'clean the pull into the partitioned store Data/cards_cleaned')
+    clean.add_argument('--engine', choices = ['pandas', 'polars'], default = 'pandas')
+    clean.add_argument('--checks', action = 'store_true', help = 'print the duplicate and missing value checks first')
+    clean.add_argument('--drop-funny', action = 'store_true', help = 'drop every funny set, not only the un-sets')
+    clean.set_defaults(run = run_clean)
+
+    agg = commands.add_parser('agg', help = 'print the set- and year-level tables')
+    agg.add_argument('--backend', choices = ['pandas', 'duckdb'], default = 'pandas')
+    agg.add_argument('--table', action = 'append', choices = table_names, help = 'table to print (repeatable, default all)')
+    agg.add_argument('--rows', type = int, default = 10, help = 'rows printed per table')
+    agg.add_argument('--csv', metavar = 'DIR', help = 'write the tables as csv files into DIR instead of printing')
+    agg.set_defaults(run = run_agg)
+
+    plot = commands.add_parser('plot', help = 'render the report figures into Data/report')
+    plot.add_argument('--backend', choices = ['pandas', 'duckdb'], default = 'pandas')
+    plot.add_argument('--force', action = 'store_true', help = 're-render figures whose inputs are unchanged')
+    plot.add_argument('--workers', type = int, help = 'rendering processes (default one per cpu)')
+    plot.add_argument('--script', choices = plot_scripts, help = 'run an agg script with its interactive plots instead')
+    plot.set_defaults(run = run_plot)
+
+    refresh = commands.add_parser('refresh', help = 'rerun the stale pipeline stages (pull only when its store is missing or forced, then incrementally)')
+    refresh.add_argument('stage', nargs = '*', help = 'stages to bring up to date with their upstream stages (default all)')
+    refresh.add_argument('--force', action = 'store_true', help = 'rerun the given stages even when fresh')
+    refresh.set_defaults(run = run_refresh)
+    return(parser)
+
+
+# parses argv (sys.argv by default) and runs the chosen subcommand, measured when a report is asked for
+def main(argv = None):
+    import logging
+    args = make_parser().parse_args(argv)
+    # pull progress and refresh summaries are logged - configured here, not by the modules that log them
+    logging.basicConfig(level = logging.INFO, format = '%(message)s')
+    if args.report is None and args.profile is None:
+        args.run(args)
+        return
+
+    import time
+    import instrument
+    started = time.time()
+    instrument.enable(trace_memory = args.trace_memory, profile_to = args.profile, profile_names = (args.command,),
+                      metrics = args.metrics)
+    try:
+        with instrument.measure(args.command):
+            args.run(args)
+    finally:
+        if args.report is not None:
+            instrument.write_report(instrument.run_report(started), args.report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,30 @@
+"""
+Oracle cards: collapses the per-printing table to one row per card (by name) at its first printing, with the
+printing count and last printing date, stored alongside the cleaned printings as Data/oracle_cards.feather
+First-printing analyses read this far smaller table (the year_first table); reprint-aware per-printing tables
+filter on the reprint flag in the rollup instead (agg_spec's year_nrp grain)
+"""
+
+import instrument
+
+
+# columns added to each oracle card
+printing_columns = ['printings', 'last_released_at']
+
+
+
+##
+# collapsing printings
+##
+
+# one row per name: every column taken from its first printing (earliest release, ties in table order),
+# plus the number of printings and the latest printing's release date
+@instrument.timed()
+def collapse_printings(cards):
+    ordered = cards.sort_values(by = 'released_at', kind = 'stable')
+    first = ordered.drop_duplicates(subset = 'name', keep = 'first').set_index('name')
+    spread = ordered.groupby('name', sort = False)['released_at'].agg(printings = 'size', last_released_at = 'max')
+    first = first.join(spread)
+    first['printings'] = first['printings'].astype('int32')
+    return(first.reset_index()[cards.columns.tolist() + printing_columns])
+
@@ -0,0 +1,146 @@
+"""
+Oracle-text ability extraction: tags each card with the normalized "functions" its rules text performs
+(draw, destroy, create token, ramp, counter spell, ...) for the functions-per-card power creep questions
+Output: a long card x function table (a sparse matrix in coordinate form) and a functions-per-card count
+"""
+
+import re
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+import instrument
+
+
+# text within one clause: stops before a period, '; ', ' then ' and ', ' or ' and ' followed by another verb, so
+# a pattern's lazy span cannot swallow a second function in the same sentence
+verbs = r'(?:return|put|search|create|draw|destroy|exile|counter|tap|sacrifice|reveal)\b'
+clause = r'(?:(?!,? then |; |(?:,|,? and) ' + verbs + r')[^.])*?'
+
+# function label -> pattern over lower-cased oracle text with the card's own name replaced by '~'
+# order matters where patterns can start at the same word: the first listed label wins that stretch of text
+function_patterns = {
+    'ramp': r'search your library for ' + clause + r'land cards?|add \{',
+    'tutor': r'search your library for ' + clause + r'(?<!land )cards?',
+    'draw': r'draws? (?:a|an|one|two|three|four|five|six|seven|x|\d+|that many) (?:additional )?cards?',
+    'discard': r'discards? (?:a|one|two|three|x|\d+|that|their|his or her|your) (?:cards?|hand)',
+    'counter_spell': r'counter target (?:[a-z]+ )*?spell',
+    'destroy': r'destroy (?:target|all|each|up to (?:one|two|three|x|\d+) target)',
+    'exile': r'exile (?:target|all|each|up to (?:one|two|three|x|\d+) target)',
+    'reanimate': r'return ' + clause + r' from (?:your|a|their|an opponent\'s) graveyard (?:to|onto) the battlefield',
+    'regrowth': r'return ' + clause + r' from your graveyard to your hand',
+    'bounce': r'return (?:target|all|each|up to (?:one|two|three|x|\d+) target) ' + clause +
+              r' to (?:its|their) owner(?:\'s|s\')? hands?',
+    'create_token': r'creates? ' + clause + r'tokens?',
+    'damage': r'deals? damage equal to|deals? (?:\d+|x|that much) (?:[a-z]+ )?damage',
+    'life_gain': r'gains? (?:\d+|x|that much) life',
+    'life_loss': r'loses? (?:\d+|x|that much) life',
+    'pump': r'gets? \+(?:\d+|x)/\+(?:\d+|x)',
+    'shrink': r'gets? -(?:\d+|x)/-(?:\d+|x)',
+    'plus_counters': r'\+1/\+1 counters?',
+    'mill': r'mills? (?:a|one|two|three|four|five|x|\d+) cards?',
+    'scry': r'(?:scry|surveil) (?:\d+|x)',
+    'sacrifice': r'sacrifices? (?:a|an|another|target|two|three|x|\d+)',
+    'fight': r'fights? ',
+    'copy': r'copy target',
+    'tap_down': r'tap target|(?:don\'t|doesn\'t) untap',
+    'protection': r'hexproof|indestructible|protection from',
+    'extra_turn': r'extra turn',
+    'enters_trigger': r'when(?:ever)? (?:~|this(?: [a-z]+)?) enters',
+    'dies_trigger': r'when(?:ever)? (?:~|this(?: [a-z]+)?) dies',
+}
+
+function_labels = list(function_patterns)
+
+# labels scanned in a pass of their own: their matches start at the same words as another label's (a tutor
+# for a creature and a land is also ramp), which one non-overlapping scan would drop
+separate_labels = ['tutor']
+
+
+# the patterns as one named-group alternation (each text scanned once for most functions), plus one pattern
+# per separate label
+def compile_patterns(patterns):
+    shared = {label: pattern for label, pattern in patterns.items() if label not in separate_labels}
+    compiled = [re.compile('|'.join('(?P<' + label + '>' + pattern + ')' for label, pattern in shared.items()))]
+    return(compiled + [re.compile('(?P<' + label + '>' + patterns[label] + ')')
+                       for label in separate_labels if label in patterns])
+
+
+combined_pattern = compile_patterns(function_patterns)
+
+
+
+##
+# tagging
+##
+
+# oracle text with the card's name (or a face's name) replaced by '~', as the rules text refers to itself
+# only whole-word occurrences are replaced (so 'Fog' leaves 'fogs' alone), and a missing name replaces nothing
+def normalize_text(name, text):
+    for face in name.split(' // '):
+        if face:
+            text = re.sub(r'(?<!\w)' + re.escape(face) + r'(?!\w)', '~', text)
+    return(text)
+
+
+# function labels found in one normalized text, in order of appearance (repeats kept)
+def tag_text(text, pattern = combined_pattern):
+    matches = [(match.start(), match.lastgroup) for compiled in pattern for match in compiled.finditer(text)]
+    return([label for _, label in sorted(matches, key = lambda match: match[0])])
+
+
+# function labels of one card's text: those of the normalized text, plus any found only in the raw text - a
+# name that is also rules words ('Exile', 'Sacrifice') still performs them in its own text
+def tag_card(name, text, pattern = combined_pattern):
+    normalized = normalize_text(name, text)
+    labels = tag_text(normalized, pattern)
+    if normalized == text:
+        return(labels)
+    return(labels + list((Counter(tag_text(text, pattern)) - Counter(labels)).elements()))
+
+
+# long table of (id, function, count) - the non-zero cells of the card x function matrix
+# each distinct (name, oracle_text) pair is tagged once and shared by every printing carrying it
+# patterns: label -> pattern to tag with instead of function_patterns (e.g. user-defined labels)
+@instrument.timed()
+def tag_functions(cards, patterns = None):
+    labels = list(patterns or function_patterns)
+    pattern = combined_pattern if patterns is None else compile_patterns(patterns)
+    texts = cards[['id', 'name', 'oracle_text']].fillna({'oracle_text': '', 'name': ''})
+    codes, unique = pd.factorize(pd.MultiIndex.from_frame(texts[['name', 'oracle_text']]))
+
+    rows, found = [], []
+    for row, (name, text) in enumerate(unique):
+        for label in tag_card(name, text, pattern):
+            rows.append(row)
+            found.append(label)
+    tagged = pd.DataFrame({'text': rows, 'function': pd.Categorical(found, categories = labels)})
+    tagged = tagged.groupby(['text', 'function'], observed = True).size().rename('count').reset_index()
+
+    # fan the per-text tags out to every card id carrying that text
+    cards_per_text = pd.DataFrame({'id': texts['id'].to_numpy(), 'text': codes})
+    card_functions = cards_per_text.merge(tagged, on = 'text')[['id', 'function', 'count']]
+    return(card_functions.astype({'id': 'string[pyarrow]', 'count': 'int32'}))
+
+
+# distinct functions per card, aligned to the cards frame (0 for cards with no tagged function)
+def functions_per_card(cards, card_functions):
+    per_card = card_functions.groupby('id', observed = True)['function'].nunique()
+    return(cards['id'].map(per_card).fillna(0).astype('int32'))
+
+
+
+##
+# sparse matrix form
+##
+
+# scipy csr matrix of function counts, rows ordered as `ids` and columns as the function categories
+# (scipy is only needed here, so tagging runs without it)
+def to_sparse_matrix(card_functions, ids):
+    from scipy import sparse
+    row_of = pd.Series(np.arange(len(ids)), index = pd.Index(ids))
+    rows = row_of.reindex(card_functions['id']).to_numpy()
+    columns = card_functions['function'].cat.codes.to_numpy()
+    return(sparse.csr_matrix((card_functions['count'].to_numpy(), (rows, columns)),
+                             shape = (len(ids), len(card_functions['function'].cat.categories))))
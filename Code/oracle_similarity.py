@@ -0,0 +1,148 @@
+"""
+Oracle-text similarity index: MinHash signatures over word shingles of the normalized rules text, banded into
+LSH buckets so "cards functionally similar to X" only compares X against the texts sharing a bucket with it
+Used to find functional reprints and upgrades without comparing every pair of oracle texts
+"""
+
+import re
+import zlib
+
+import numpy as np
+
+from oracle_functions import normalize_text
+
+
+# signature length and banding: 32 bands of 4 rows make texts with jaccard similarity around 0.4 and up
+# likely to share a bucket, and texts below 0.2 unlikely to
+num_hashes = 128
+band_rows = 4
+
+shingle_words = 3
+
+# hashes are taken modulo a mersenne prime below 2^32, so a * x + b stays within uint64
+prime = np.uint64((1 << 31) - 1)
+empty_slot = np.iinfo(np.uint64).max
+
+
+
+##
+# normalizing and shingling
+##
+
+# rules text with the card's name as '~' and every number as '#', so cards differing only in their name or
+# in their numbers (damage, cost, +n/+n) look the same - without a name only the numbers are abstracted
+def normalize(name, text):
+    text = normalize_text((name or '').lower(), text.lower())
+    return(re.sub(r'\d+', '#', text))
+
+
+# crc32 of each run of shingle_words words (the whole text for shorter texts)
+def shingle_hashes(text):
+    words = re.findall(r"[^\s.,;:()\"]+", text)
+    if not words:
+        return([])
+    if len(words) <= shingle_words:
+        return([zlib.crc32(' '.join(words).encode('utf-8'))])
+    return(list({zlib.crc32(' '.join(words[i:i + shingle_words]).encode('utf-8'))
+                 for i in range(len(words) - shingle_words + 1)}))
+
+
+
+##
+# minhash signatures
+##
+
+# (a, b) for num_hashes universal hash functions h(x) = (a * x + b) mod prime
+def hash_parameters(seed = 0):
+    rng = np.random.default_rng(seed)
+    return(rng.integers(1, int(prime), num_hashes, dtype = np.uint64),
+           rng.integers(0, int(prime), num_hashes, dtype = np.uint64))
+
+
+# texts x num_hashes matrix of minimum hashes, computed over the flattened shingles of every text at once
+# (a few hash functions per pass, bounding memory) - texts with no shingles keep empty_slot everywhere
+def minhash_signatures(shingles, seed = 0, chunk = 16):
+    a, b = hash_parameters(seed)
+    lengths = np.array([len(hashes) for hashes in shingles])
+    values = np.fromiter((h for hashes in shingles for h in hashes), dtype = np.uint64, count = lengths.sum())
+    values %= prime
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    present = lengths > 0
+
+    signatures = np.full((len(shingles), num_hashes), empty_slot, dtype = np.uint64)
+    for first in range(0, num_hashes, chunk):
+        hashed = (a[first:first + chunk, None] * values[None, :] + b[first:first + chunk, None]) % prime
+        if len(values):
+            signatures[present, first:first + chunk] = np.minimum.reduceat(hashed, starts[present], axis = 1).T
+    return(signatures)
+
+
+# one bucket key per band: each band's rows mixed into a single uint64 (wrapping multiply-add)
+def band_keys(signatures, seed = 0):
+    n_bands = num_hashes // band_rows
+    mix = np.random.default_rng(seed + 1).integers(1, 1 << 62, band_rows, dtype = np.uint64) | np.uint64(1)
+    bands = signatures[:, :n_bands * band_rows].reshape(len(signatures), n_bands, band_rows)
+    with np.errstate(over = 'ignore'):
+        return((bands * mix).sum(axis = 2, dtype = np.uint64))
+
+
+
+##
+# index
+##
+
+# similarity index over the distinct oracle texts of a cleaned card table
+# each distinct (name, oracle_text) is indexed once and represented by its first printing
+class OracleIndex:
+
+    def __init__(self, cards, seed = 0):
+        printings = cards.dropna(subset = ['oracle_text']).sort_values(by = ['released_at', 'cmc'], kind = 'stable')
+        first = printings.drop_duplicates(subset = ['name', 'oracle_text'])
+        self.cards = first[['name', 'set', 'released_at', 'cmc', 'type_line', 'oracle_text']].reset_index(drop = True)
+        self.seed = seed
+
+        texts = [normalize(name, text) for name, text in zip(self.cards['name'], self.cards['oracle_text'])]
+        self.signatures = minhash_signatures([shingle_hashes(text) for text in texts], seed = seed)
+        self.keys = band_keys(self.signatures, seed = seed)
+
+        # per band, the texts sorted by bucket key, so a bucket is found by binary search
+        self.order = np.argsort(self.keys, axis = 0, kind = 'stable')
+        self.sorted_keys = np.take_along_axis(self.keys, self.order, axis = 0)
+        self.searchable = (self.signatures != empty_slot).any(axis = 1)
+
+    def __len__(self):
+        return(len(self.cards))
+
+    # positions of the texts sharing at least one band bucket with the given band keys
+    def candidates(self, keys):
+        found = []
+        for band, key in enumerate(keys):
+            column = self.sorted_keys[:, band]
+            start, stop = np.searchsorted(column, key, 'left'), np.searchsorted(column, key, 'right')
+            found.append(self.order[start:stop, band])
+        found = np.unique(np.concatenate(found)) if found else np.array([], dtype = np.int64)
+        return(found[self.searchable[found]])
+
+    # indexed texts similar to a signature, with their estimated jaccard similarity, ordered by release and cmc
+    def query_signature(self, signature, min_similarity = 0.5, exclude = None):
+        keys = band_keys(signature[None, :], seed = self.seed)[0]
+        found = self.candidates(keys)
+        if exclude is not None:
+            found = found[found != exclude]
+        similarity = (self.signatures[found] == signature).mean(axis = 1)
+        keep = similarity >= min_similarity
+        matches = self.cards.iloc[found[keep]].assign(similarity = similarity[keep])
+        return(matches.sort_values(by = ['released_at', 'cmc'], kind = 'stable'))
+
+    # cards functionally similar to the named card (its first printing's text), ordered by release date and cmc
+    def similar_to(self, name, min_similarity = 0.5):
+        positions = np.flatnonzero(self.cards['name'].to_numpy() == name.lower())
+        if len(positions) == 0:
+            raise KeyError('no indexed oracle text for ' + name)
+        return(self.query_signature(self.signatures[positions[0]], min_similarity, exclude = positions[0]))
+
+    # cards similar to any rules text (e.g. a spoiler), normalized the same way as the indexed texts - pass the
+    # card's name when the text refers to itself by it
+    def similar_to_text(self, text, name = None, min_similarity = 0.5):
+        signature = minhash_signatures([shingle_hashes(normalize(name, text))], seed = self.seed)[0]
+        return(self.query_signature(signature, min_similarity))
@@ -0,0 +1,244 @@
+"""
+Pipeline runner: the pull -> clean -> tables -> report stages as a dependency graph of declared input and output
+paths, rerunning only the stages whose inputs changed (size + mtime, then sha256) or whose outputs are missing,
+and running stages that do not depend on each other in parallel processes
+Usage: python Code/pipeline_dag.py [stage ...] [--force] [--profile] [--trace-memory] [--metrics]
+(from the repository root; default every stage)
+"""
+
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import agg_cache
+import instrument
+
+
+state_dir = 'Data/pipeline'
+tables_dir = 'Data/tables'
+workers = os.cpu_count() or 1
+
+# aggregation backend for the table stages: 'pandas' or 'duckdb'
+backend = 'pandas'
+
+# every run writes its stage, step and aggregation timings here (instrument.py) - compare two with
+# python Code/instrument.py old.json new.json
+report_path = os.path.join(state_dir, 'run_report.json')
+
+
+
+##
+# stage functions - each runs in a worker process, called with the stage's inputs, outputs and options
+##
+
+# data_pull.py's pull into the pull store - incremental, so a forced pull only fetches the cards released since
+# the stored pull (a full crawl when there is no store yet)
+def pull_cards(inputs, outputs):
+    import logging
+    import data_pull
+    logging.basicConfig(level = logging.INFO, format = '%(message)s') # progress of the worker's pull
+    data_pull.pull(store_path = outputs[0], incremental = True)
+
+
+# data_cleaning.py's cleaning of the pull into the derived tables and the partitioned store, written to the
+# stage's declared outputs
+def clean_cards(inputs, outputs):
+    import data_cleaning
+    sets_path, card_functions_path, oracle_cards_path, store_path = outputs
+    data_cleaning.clean(source_path = inputs[0], store_path = store_path, sets_path = sets_path,
+                        card_functions_path = card_functions_path, oracle_cards_path = oracle_cards_path)
+
+
+# agg_cache tables of one store, one parquet file per output (parquet keeps the grain index and dtypes)
+def write_tables(inputs, outputs, grain_names, years = None, percents = False):
+    import agg_spec
+    tables = agg_cache.cached_grains(inputs[0], grain_names, years = years, backend = backend)
+    for name, path in zip(grain_names, outputs):
+        table = agg_spec.add_percents(tables[name]) if percents else tables[name]
+        os.makedirs(os.path.dirname(path), exist_ok = True)
+        table.to_parquet(path)
+
+
+# agg_cache's keyword cmc trend table of one store
+def write_keyword_table(inputs, outputs):
+    os.makedirs(os.path.dirname(outputs[0]), exist_ok = True)
+    agg_cache.keyword_table(inputs[0]).to_parquet(outputs[0])
+
+
+# plot_report.py's headless report from the table files, named by their file names
+def render_report(inputs, outputs):
+    import pandas as pd
+    import plot_report
+    tables = {os.path.splitext(os.path.basename(path))[0]: pd.read_parquet(path) for path in inputs}
+    plot_report.build_report(tables, out_dir = os.path.dirname(outputs[0]))
+
+
+
+##
+# stages
+##
+
+# where a table stage writes one table
+def table_path(name):
+    return(os.path.join(tables_dir, name + '.parquet'))
+
+report_table_names = ['set', 'year', 'year_nrp', 'year_set_type', 'year_recent', 'year_first', 'keyword_years']
+
+# stage name -> (input paths, output paths, function, options) - a stage depends on the stages whose outputs it reads
+# the pull has no inputs, so it only runs when its store is missing or it is forced (then topping the store up)
+stages = {
+    'pull': ([], ['Data/cards.feather'], pull_cards, {}),
+    'clean': (['Data/cards.feather'], ['Data/sets.feather', 'Data/card_functions.feather', 'Data/oracle_cards.feather',
+                                       'Data/cards_cleaned'], clean_cards, {}),
+    'set_tables': (['Data/cards_cleaned'], [table_path('set')], write_tables,
+                   dict(grain_names = ['set'], percents = True)),
+    'year_tables': (['Data/cards_cleaned'], [table_path(name) for name in ['year', 'year_nrp', 'year_set_type']],
+                    write_tables, dict(grain_names = ['year', 'year_nrp', 'year_set_type'])),
+    'recent_tables': (['Data/cards_cleaned'], [table_path('year_recent')], write_tables,
+                      dict(grain_names = ['year'], years = (2015, 2023))),
+    'first_printing_tables': (['Data/oracle_cards.feather'], [table_path('year_first')], write_tables,
+                              dict(grain_names = ['year'])),
+    'keyword_tables': (['Data/cards_cleaned'], [table_path('keyword_years')], write_keyword_table, {}),
+    'report': ([table_path(name) for name in report_table_names], ['Data/report/manifest.json'], render_report, {}),
+}
+
+
+
+##
+# graph
+##
+
+# stage -> the stages producing its inputs
+def upstream(stages = stages):
+    producers = {path: name for name, (_, outputs, _, _) in stages.items() for path in outputs}
+    return({name: sorted({producers[path] for path in inputs if path in producers})
+            for name, (inputs, _, _, _) in stages.items()})
+
+
+# the targets and every stage they depend on, in the registry's order
+def with_upstream(targets, stages = stages):
+    parents = upstream(stages)
+    needed = set()
+    pending = list(targets)
+    while pending:
+        name = pending.pop()
+        if name not in needed:
+            needed.add(name)
+            pending.extend(parents[name])
+    return([name for name in stages if name in needed])
+
+
+
+##
+# freshness
+##
+
+# each stage's fingerprint at its last successful run
+def read_state(state_dir = state_dir):
+    path = os.path.join(state_dir, 'state.json')
+    if not os.path.exists(path):
+        return({})
+    with open(path) as f:
+        return(json.load(f))
+
+
+# written aside and moved into place, so an interrupted run leaves the previous state
+def write_state(state, state_dir = state_dir):
+    os.makedirs(state_dir, exist_ok = True)
+    path = os.path.join(state_dir, 'state.json')
+    with open(path + '.tmp', 'w') as f:
+        json.dump(state, f, indent = 1, sort_keys = True)
+    os.replace(path + '.tmp', path)
+
+
+# what a stage's last run depended on: its inputs' digests (agg_cache.input_digest - files are only re-hashed
+# when their size or mtime changed) and its function and options
+def fingerprint(name, stages = stages, state_dir = state_dir):
+    inputs, _, function, options = stages[name]
+    return({'inputs': {path: agg_cache.input_digest(path, state_dir) for path in inputs},
+            'stage': function.__name__ + repr(sorted(options.items()))})
+
+
+# whether a stage must run: an output is missing, or an input or its options changed since its last run
+# (a stage without inputs, like the pull, is fresh while its outputs exist)
+def is_stale(name, fingerprint, state, stages = stages):
+    inputs, outputs, _, _ = stages[name]
+    missing = not all(os.path.exists(path) for path in outputs)
+    return(missing or (len(inputs) > 0 and state.get(name) != fingerprint))
+
+
+
+##
+# running
+##
+
+# runs one stage in a worker process, measured with instrument.enable's options (profiling the stage itself
+# when a profile folder is given) - returns its name and measurements
+def run_stage(name, stages = stages, measure_options = {}):
+    inputs, outputs, function, options = stages[name]
+    instrument.enable(profile_names = (name,), **measure_options)
+    with instrument.measure(name):
+        function(inputs, outputs, **options)
+    return(name, list(instrument.records))
+
+
+# runs the stale stages among the targets (every stage by default) and their upstream stages, each once its
+# upstream stages are done, up to `workers` at a time - returns the names of the stages run
+# force reruns the targets even when fresh (by default every stage but the pull)
+# the stages' measurements go to report_path, taken with instrument.enable's options (trace_memory, profile_to,
+# profile_with, metrics) - the report is written even when a stage fails
+def run_pipeline(targets = None, force = False, workers = workers, stages = stages, state_dir = state_dir,
+                 report_path = report_path, measure_options = {}):
+    names = with_upstream(targets or list(stages), stages)
+    forced = set(targets or [name for name in names if stages[name][0]]) if force else set()
+    parents = upstream(stages)
+    state = read_state(state_dir)
+    done = set()
+    ran = []
+    running = {}
+    measurements = []
+    started = time.time()
+
+    try:
+        # a fresh process per stage, so each stage's lifetime peak RSS is its own
+        with ProcessPoolExecutor(max_workers = workers, max_tasks_per_child = 1) as pool:
+            while len(done) < len(names):
+                for name in names:
+                    if name in done or name in running.values() or not all(parent in done for parent in parents[name]):
+                        continue
+                    # fingerprinted once its upstream stages have written their outputs
+                    stage_fingerprint = fingerprint(name, stages, state_dir)
+                    if name in forced or is_stale(name, stage_fingerprint, state, stages):
+                        running[pool.submit(run_stage, name, stages, measure_options)] = name
+                        state[name] = stage_fingerprint
+                    else:
+                        done.add(name)
+                if not running:
+                    continue
+
+                finished, _ = wait(running, return_when = FIRST_COMPLETED)
+                for job in finished:
+                    name = running.pop(job)
+                    _, stage_measurements = job.result() # a failed stage stops the run, its fingerprint unrecorded
+                    measurements += stage_measurements
+                    done.add(name)
+                    ran.append(name)
+                    write_state({stage: state[stage] for stage in state if stage not in running.values()}, state_dir)
+    finally:
+        report = instrument.run_report(started, measurements)
+        report['stages_run'] = ran
+        instrument.write_report(report, report_path)
+
+    return(ran)
+
+
+if __name__ == '__main__':
+    # --profile dumps a cProfile per stage, --trace-memory adds tracemalloc peaks, --metrics times each metric
+    flags = [arg for arg in sys.argv[1:] if arg.startswith('--')]
+    targets = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    measure_options = {'trace_memory': '--trace-memory' in flags, 'metrics': '--metrics' in flags,
+                       'profile_to': os.path.join(state_dir, 'profiles') if '--profile' in flags else None}
+    ran = run_pipeline(targets or None, force = '--force' in flags, measure_options = measure_options)
+    print('ran ' + str(len(ran)) + ' stages: ' + (', '.join(ran) or 'all fresh'))
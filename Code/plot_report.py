@@ -0,0 +1,101 @@
+"""
+Headless report: renders every figure in figures.py to PNG/SVG with the Agg backend, spread across a process pool
+Figures whose input table and drawing options are unchanged since the last run (per Data/report/manifest.json)
+are skipped
+Usage: python Code/plot_report.py [--force]
+"""
+
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+matplotlib.use('Agg') # no windows - figures are only written to files
+
+import pandas as pd
+from matplotlib import pyplot as plt
+
+import agg_cache
+import figures
+import instrument
+
+
+store_path = 'Data/cards_cleaned'
+oracle_cards_path = 'Data/oracle_cards.feather'
+report_dir = 'Data/report'
+formats = ['png', 'svg']
+workers = os.cpu_count() or 1
+
+# aggregation backend for the input tables: 'pandas' or 'duckdb'
+backend = 'pandas'
+
+
+
+##
+# digests
+##
+
+# sha256 of a table's contents (index included)
+def table_digest(table):
+    hashes = pd.util.hash_pandas_object(table.reset_index(), index = False).to_numpy()
+    return(hashlib.sha256(hashes.tobytes() + ','.join(map(str, table.reset_index().columns)).encode('utf-8')).hexdigest())
+
+
+# what a figure's output depends on: its input table, drawing function and options, and the output formats
+def figure_digest(name, table_digests):
+    table_name, function, options = figures.figures[name]
+    spec = json.dumps({'table': table_digests[table_name], 'function': function.__name__, 'options': repr(options),
+                       'version': figures.figures_version, 'formats': formats}, sort_keys = True)
+    return(hashlib.sha256(spec.encode('utf-8')).hexdigest())
+
+
+
+##
+# rendering
+##
+
+# renders one figure to every format (runs in a pool worker) and returns its name
+def render(name, table, out_dir, formats):
+    plt.rcdefaults()
+    figure = plt.figure(figsize = (8, 5))
+    figures.draw(name, {figures.figures[name][0]: table})
+    for extension in formats:
+        figure.savefig(os.path.join(out_dir, name + '.' + extension), bbox_inches = 'tight', dpi = 120)
+    plt.close(figure)
+    return(name)
+
+
+# renders the figures whose digest changed (all of them with force) and updates the manifest
+# returns the names rendered
+@instrument.timed()
+def build_report(tables, out_dir = report_dir, force = False, workers = workers):
+    os.makedirs(out_dir, exist_ok = True)
+    manifest_path = os.path.join(out_dir, 'manifest.json')
+    manifest = {}
+    if os.path.exists(manifest_path) and not force:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+    table_digests = {name: table_digest(table) for name, table in tables.items()}
+    digests = {name: figure_digest(name, table_digests) for name in figures.figures}
+    stale = [name for name, digest in digests.items()
+             if manifest.get(name) != digest or
+             not all(os.path.exists(os.path.join(out_dir, name + '.' + extension)) for extension in formats)]
+
+    if stale:
+        with ProcessPoolExecutor(max_workers = min(workers, len(stale))) as pool:
+            jobs = [pool.submit(render, name, tables[figures.figures[name][0]], out_dir, formats) for name in stale]
+            for job in jobs:
+                manifest[job.result()] = digests[job.result()]
+
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent = 1, sort_keys = True)
+    return(stale)
+
+
+if __name__ == '__main__':
+    tables = agg_cache.report_tables(store_path, oracle_cards_path, backend)
+    rendered = build_report(tables, force = '--force' in sys.argv[1:])
+    print('rendered ' + str(len(rendered)) + ' of ' + str(len(figures.figures)) + ' figures into ' + report_dir)
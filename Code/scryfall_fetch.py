@@ -0,0 +1,176 @@
+"""
+Scryfall fetch engine: one pooled HTTP session, concurrent page pulls under a requests-per-second limit
+Output: card dictionaries from a cards/search query, assembled in page order
+"""
+
+# Documentation on Scryfall's rate limits and search pagination:
+# https://scryfall.com/docs/api
+# https://scryfall.com/docs/api/cards/search
+
+import logging
+import math
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+# base api url - can be pointed at a local stub server (see stub_server.py) for offline runs
+api_url = 'https://api.scryfall.com'
+
+# scryfall asks for 50-100 milliseconds between requests, i.e. no more than ~10 requests per second
+default_requests_per_second = 10
+
+# statuses worth retrying: rate limited (429) and transient server errors
+retry_statuses = {429, 500, 502, 503, 504}
+
+logger = logging.getLogger(__name__)
+
+
+
+##
+# rate limiting and session setup
+##
+
+# hands out evenly spaced request slots across every thread sharing the limiter
+class RateLimiter:
+
+    def __init__(self, requests_per_second):
+        self.interval = 1.0 / requests_per_second
+        self.lock = threading.Lock()
+        self.next_slot = time.monotonic()
+
+    # blocks the calling thread until its slot comes up
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        time.sleep(max(0.0, slot - now))
+
+
+# one session for the whole pull so connections (and tls handshakes) are reused across pages
+def make_session(pool_size = 4):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections = 1, pool_maxsize = pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({'User-Agent': 'mtg_pow_creep/1.0', 'Accept': 'application/json'})
+    return(session)
+
+
+
+##
+# page fetching
+##
+
+# seconds to wait from a Retry-After header - delay seconds or an http date (RFC 9110) - falling back to
+# `default` when the header is missing or unreadable
+def retry_delay(retry_after, default):
+    if not retry_after:
+        return(default)
+    try:
+        return(max(0.0, float(retry_after)))
+    except ValueError:
+        pass
+    try:
+        return(max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time()))
+    except (TypeError, ValueError):
+        return(default)
+
+
+# pulls a single page, retrying 429/5xx and connection errors with exponential backoff
+# a Retry-After header from the server takes priority over the computed backoff
+def fetch_page(session, limiter, url, params, retries = 5, backoff = 0.5, timeout = 30):
+    for attempt in range(retries + 1):
+        limiter.wait()
+        try:
+            response = session.get(url, params = params, timeout = timeout)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == retries:
+                raise
+            time.sleep(backoff * 2 ** attempt)
+            continue
+
+        if response.status_code in retry_statuses and attempt < retries:
+            time.sleep(retry_delay(response.headers.get('Retry-After'), backoff * 2 ** attempt))
+            continue
+
+        response.raise_for_status()
+        return(response.json())
+
+
+# yields (page_number, payload) for every page of a cards/search query, in page order
+# page 1 is fetched first to learn total_cards, the remaining pages are then fetched concurrently
+def iter_search_pages(query, order = 'name', base_url = None,
+                      requests_per_second = default_requests_per_second,
+                      workers = 4, session = None):
+    url = (base_url or api_url) + '/cards/search'
+    limiter = RateLimiter(requests_per_second)
+    own_session = session is None
+    if own_session:
+        session = make_session(pool_size = workers)
+
+    def params_for(page):
+        return({'q': query, 'order': order, 'page': page})
+
+    try:
+        try:
+            first = fetch_page(session, limiter, url, params_for(1))
+        except requests.HTTPError as error:
+            # scryfall answers 404 when a query matches no cards at all
+            if error.response is not None and error.response.status_code == 404:
+                return
+            raise
+
+        yield 1, first
+        last = first
+        page = 1
+
+        if first['has_more']:
+            page_size = len(first['data'])
+            total_pages = math.ceil(first['total_cards'] / page_size)
+
+            # executor.map yields results in submission order, so pages stay in order
+            with ThreadPoolExecutor(max_workers = workers) as executor:
+                results = executor.map(lambda page: fetch_page(session, limiter, url, params_for(page)),
+                                       range(2, total_pages + 1))
+                for page, last in enumerate(results, start = 2):
+                    yield page, last
+
+        # total_cards is an estimate - keep walking serially if the last page still reports more
+        while last['has_more']:
+            page += 1
+            last = fetch_page(session, limiter, url, params_for(page))
+            yield page, last
+    finally:
+        if own_session:
+            session.close()
+
+
+# convenience wrapper returning the flat list of card dictionaries across every page
+def fetch_all_cards(query, **kwargs):
+    return([card for page, payload in iter_search_pages(query, **kwargs) for card in payload['data']])
+
+
+
+##
+# progress reporting
+##
+
+# counts pages and cards as they stream past, logging a line every log_every pages and on the final page
+class PullProgress:
+
+    def __init__(self, log_every = 10):
+        self.log_every = log_every
+        self.pages = 0
+        self.cards = 0
+
+    def update(self, page, payload):
+        self.pages += 1
+        self.cards += len(payload['data'])
+        if page % self.log_every == 0 or not payload['has_more']:
+            logger.info('Pulled page %d (%d cards so far)', page, self.cards)
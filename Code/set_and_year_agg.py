@@ -4,95 +4,44 @@ Summarizing the data by set for exploration of several metrics over time.
 """
 
 import pandas as pd 
-import seaborn as sns 
 from matplotlib import pyplot as plt 
 
+import agg_cache 
+import card_store 
+import cmc_trends 
+import figures 
+import oracle_similarity 
+
 
 # enable show all columns for data check 
 pd.set_option('display.max_columns', None)
 
+# aggregation backend: 'pandas', or 'duckdb' to run the rollups as multi-threaded SQL over the store 
+backend = 'pandas'
+
 
 # pulling card data 
-cards = pd.read_feather('Data/cards_cleaned.feather')
+cards = card_store.read_store('Data/cards_cleaned')
 cards.info()
 
 
 
 ##
-# making temporary binary feature for aggregation
-##
-
-# card types binaries 
-cards['nonland_spell'] = cards['type_line'].str.contains('land') == False 
-cards['creature'] = cards['type_line'].str.contains('creature')
-cards['enchantment'] = cards['type_line'].str.contains('enchantment') 
-cards['artifact'] = cards['type_line'].str.contains('artifact') 
-cards['instant_sorcery'] = cards['type_line'].str.contains('instant|sorcery') 
-cards['planeswalkers'] = cards['type_line'].str.contains('planeswalk')
-
-# card color binaries 
-cards['blue'] = cards['colors'].str.contains('u') 
-cards['black'] = cards['colors'].str.contains('b')
-cards['white'] = cards['colors'].str.contains('w')
-cards['green']= cards['colors'].str.contains('g')
-cards['red'] = cards['colors'].str.contains('r')
-
-
-
-##
-# aggregating into a set-level table using conditional functions and agg 
+# aggregating into set- and year-level tables from the shared metric spec (agg_spec.py) 
 ## 
 
-# conditional function for total non-reprints (sum of bool is a count)
-def total_non_reprints(x): 
-    return(sum(x == False))
-
-# conditional function for total non-land cards 
-def total_non_land(x): 
-    return(sum(x == True))
-
-# conditional function for total land cards
-def total_land(x): 
-    return(sum(x == False))
-
-# generating a set-level summary table 
-set_agg = cards.groupby('set').agg(
-    release_date = ('released_at', max), 
-    total_cards = ('name', 'nunique'), 
-    total_non_reprints = ('reprint', total_non_reprints), 
-    total_non_lands = ('nonland_spell', total_non_land),
-    average_nonland_cmc = ('cmc', 'mean'),  # need logic to define non-land 
-    highest_nonland_cmc = ('cmc', max), 
-    total_creatures = ('creature', sum), 
-    total_enchantments = ('enchantment', sum), 
-    total_artifacts = ('artifact', sum), 
-    total_instant_sorceries = ('instant_sorcery', sum), 
-    total_planeswalkers = ('planeswalkers', sum), 
-    total_lands = ('nonland_spell', total_land),
-    total_foils = ('foil', sum), # total count of cards with foil prints
-    total_white = ('white', sum), 
-    total_blue = ('blue', sum), 
-    total_black = ('black', sum), 
-    total_red = ('red', sum), 
-    total_green = ('green', sum), 
-    average_edhrec_legendaries = ('edhrec_rank', 'mean'), 
-    highest_edhrec_legendaries = ('edhrec_rank', max), 
-    lowest_edhrec_legendaries = ('edhrec_rank', min)  
-)
-
-set_agg.sort_values(by = 'release_date').head(10)
+# card type and color binaries (creature, nonland_spell, blue, ...) are precomputed by data_cleaning.py 
+# every table is rolled up from a single aggregation at the finest grain the requested tables share, and 
+# cached on disk (Data/agg_cache) until the cleaned store or the metric spec changes - only the columns the 
+# tables use are read 
+# set (with % of totals), year, year without reprints, year x set type, recent years (only the 2015-2023 
+# partitions read) and first printings (the oracle cards table) 
+tables = agg_cache.report_tables('Data/cards_cleaned', 'Data/oracle_cards.feather', backend = backend)
 
+# set-level summary table 
+set_agg = tables['set']
 
-# secondary aggregation step to calculate % of totals 
-set_agg
-set_agg[['percent_creatures', 'percent_foils',
-         'percent_white', 'percent_blue', 'percent_black', 
-         'percent_green', 'percent_red']] =   [(set_agg['total_creatures'] / set_agg['total_cards']) * 100, 
-     (set_agg['total_foils'] / set_agg['total_cards']) * 100, 
-     (set_agg['total_white'] / set_agg['total_cards']) * 100, 
-     (set_agg['total_blue'] / set_agg['total_cards']) * 100, 
-     (set_agg['total_green'] / set_agg['total_cards']) * 100, 
-     (set_agg['total_red'] / set_agg['total_cards']) * 100]
+set_agg.sort_values(by = 'release_date').head(10)
 
 
 
@@ -101,23 +50,11 @@ set_agg[['percent_creatures', 'percent_foils',
 # visualizing total cards by set and release date 
 ## 
 
+# every chart is drawn by its entry in figures.py - the same drawing plot_report.py renders headless 
 set_agg.info()
 set_agg.head(2)
 
-sns.lineplot(data = set_agg, x = 'release_date', y = 'total_cards')
-sns.set_style("dark", {'axes.grid' : False})
-
-ticks = plt.gca().get_xticks()
-first_date = min(set_agg['release_date'])
-last_date = max(set_agg['release_date'])
-plt.gca().set_xticks([ticks[0], ticks[-1]])
-plt.gca().set_xticklabels([first_date, last_date])
-
-plt.xlabel('Set Release Date')
-plt.ylabel('Total Cards Printed')
-plt.ylim(0, 400)
-plt.title('Cards Printed by Set Date')
-plt.xticks(rotation = 45)
+figures.draw('cards_by_set_date', tables)
 plt.show() 
 
 
@@ -126,28 +63,7 @@ plt.show()
 ##
 # aggregating to a year-level 
 ##
-year_agg = cards.groupby('year').agg(
-    total_cards = ('name', 'nunique'), 
-    total_non_reprints = ('reprint', total_non_reprints), 
-    total_non_lands = ('nonland_spell', total_non_land),
-    average_nonland_cmc = ('cmc', 'mean'),  # need logic to define non-land 
-    highest_nonland_cmc = ('cmc', max), 
-    total_creatures = ('creature', sum), 
-    total_enchantments = ('enchantment', sum), 
-    total_artifacts = ('artifact', sum), 
-    total_instant_sorceries = ('instant_sorcery', sum), 
-    total_planeswalkers = ('planeswalkers', sum), 
-    total_lands = ('nonland_spell', total_land),
-    total_foils = ('foil', sum), # total count of cards with foil prints
-    total_white = ('white', sum), 
-    total_blue = ('blue', sum), 
-    total_black = ('black', sum), 
-    total_red = ('red', sum), 
-    total_green = ('green', sum), 
-    average_edhrec_legendaries = ('edhrec_rank', 'mean'), 
-    highest_edhrec_legendaries = ('edhrec_rank', max), 
-    lowest_edhrec_legendaries = ('edhrec_rank', min)  
-)
+year_agg = tables['year']
 
 
 
@@ -158,86 +74,53 @@ year_agg = cards.groupby('year').agg(
 ##
 
 # plotting all cards, including reprints 
-sns.lineplot(data = year_agg, x = 'year', y = 'total_cards')
-sns.set_style("dark", {'axes.grid' : False})
-plt.xlabel('Set Year')
-plt.ylabel('Total Cards Printed')
-plt.title('Cards Printed by Set Date')
-plt.xticks(rotation = 45)
+figures.draw('cards_by_year', tables)
 plt.show() 
 
 
 # plotting excluding reprints 
-sns.lineplot(data = year_agg, x = 'year', y = 'total_non_reprints')
-sns.set_style("dark", {'axes.grid' : False})
-plt.xlabel('Set Year')
-plt.ylabel('Total Cards Printed')
-plt.title('Cards Printed by Set Date')
-plt.xticks(rotation = 45)
+figures.draw('non_reprints_by_year', tables)
 plt.show() 
 
 # plotting average cmc 
-sns.lineplot(data = year_agg, x = 'year', y = 'average_nonland_cmc')
-sns.set_style("dark", {'axes.grid' : False})
-plt.xlabel('Set Year')
-plt.ylabel('CMC')
-plt.title('Average CMC of Non-Land Spells by Set Year')
-plt.xticks(rotation = 45)
+figures.draw('average_cmc_by_year', tables)
 plt.show() 
 
 # plotting color of spells by year 
-plt.plot(year_agg.index, year_agg['total_white'], label = 'White Cards')
-plt.plot(year_agg.index, year_agg['total_blue'], label = 'Blue Cards')
-plt.plot(year_agg.index, year_agg['total_red'], label = 'Red Cards') 
-plt.plot(year_agg.index, year_agg['total_green'], label = 'Green Cards')
-plt.plot(year_agg.index, year_agg['total_black'], label = 'Black Cards')
-plt.xlabel('Set Year')
-plt.ylabel('Total Cards Released')
-plt.title('Total Cards Printed by Color and Set Year')
-plt.legend()
+figures.draw('colors_by_year', tables)
+plt.show()
+
+# colorless and multicolor cards by year 
+figures.draw('colorless_multicolor_by_year', tables)
 plt.show()
 
 # plotting card types by year 
-plt.plot(year_agg.index, year_agg['total_creatures'], label = 'Creatures')
-plt.plot(year_agg.index, year_agg['total_enchantments'], label = 'Enchantments')
-plt.plot(year_agg.index, year_agg['total_artifacts'], label = 'Artifacts') 
-plt.plot(year_agg.index, year_agg['total_planeswalkers'], label = 'Planeswalkers')
-plt.plot(year_agg.index, year_agg['total_instant_sorceries'], label = 'Instants/Sorceries')
-plt.plot(year_agg.index, year_agg['total_lands'], label = 'Lands')
-plt.xlabel('Set Year')
-plt.ylabel('Total Cards Released')
-plt.title('Total Cards Printed by Card Type and Set Year')
-plt.legend()
+figures.draw('card_types_by_year', tables)
 plt.show()
 
-# card types by year - resizing axes 
-sns.set_style("dark", {'axes.grid' : True})
-plt.plot(year_agg.index, year_agg['total_creatures'], label = 'Creatures')
-plt.plot(year_agg.index, year_agg['total_enchantments'], label = 'Enchantments')
-plt.plot(year_agg.index, year_agg['total_artifacts'], label = 'Artifacts') 
-plt.plot(year_agg.index, year_agg['total_planeswalkers'], label = 'Planeswalkers')
-plt.plot(year_agg.index, year_agg['total_instant_sorceries'], label = 'Instants/Sorceries')
-plt.plot(year_agg.index, year_agg['total_lands'], label = 'Lands')
-plt.xlabel('Set Year')
-plt.ylabel('Total Cards Released')
-plt.xlim(2015, 2023)
-plt.title('Total Cards Printed by Card Type and Set Year (Recent Years)')
-plt.legend()
+# card types by year - recent years only, aggregated from just the 2015-2023 partitions of the store 
+figures.draw('card_types_recent', tables)
 plt.show()
 
+# cards printed by set type and year (expansion, core, masters, commander, ...) - set types as in the 
+# sets table built by data_cleaning.py (Data/sets.feather) 
+figures.draw('set_types_by_year', tables)
+plt.show() 
+
+# creatures strictly better than an earlier creature (same colors, no higher cmc, no lower stats, superset 
+# of keywords), counted at their first printing 
+figures.draw('strictly_better_by_year', tables)
+plt.show() 
+
 # card types by year - resizing axes 
-sns.set_style("dark", {'axes.grid' : True})
-plt.plot(year_agg.index, year_agg['average_edhrec_legendaries'], label = 'Average Rank')
-plt.plot(year_agg.index, year_agg['highest_edhrec_legendaries'], label = 'Highest Rank')
-plt.xlabel('Set Year')
-plt.ylabel('EDHREC Rank')
-plt.xlim(2010, 2023)
-plt.title('Current EDHREC Rank of Legendaries by Set Year (Highest and Average)')
-plt.legend()
+figures.draw('edhrec_by_year', tables)
 plt.show()
 
 
-cards.query('edhrec_rank > 0 & year == 2015')[['name', 'edhrec_rank', 'type_line']].sort_values(by = 'edhrec_rank').head(50)
+# one year's cards, read from its partition with only the columns needed 
+cards_2015 = card_store.read_store('Data/cards_cleaned', columns = ['name', 'edhrec_rank', 'type_line'], 
+                                   filter = card_store.year_between(2015, 2015))
+cards_2015.query('edhrec_rank > 0').sort_values(by = 'edhrec_rank').head(50)
 
 
 
@@ -245,83 +128,70 @@ cards.query('edhrec_rank > 0 & year == 2015')[['name', 'edhrec_rank', 'type_line
 ##
 # aggregating to a year-level and removing reprints 
 ##
-year_agg_nrp = cards.query('reprint == False').groupby('year').agg(
-    total_cards = ('name', 'nunique'), 
-    total_non_reprints = ('reprint', total_non_reprints), 
-    total_non_lands = ('nonland_spell', total_non_land),
-    average_nonland_cmc = ('cmc', 'mean'),  # need logic to define non-land 
-    highest_nonland_cmc = ('cmc', max), 
-    total_creatures = ('creature', sum), 
-    total_enchantments = ('enchantment', sum), 
-    total_artifacts = ('artifact', sum), 
-    total_instant_sorceries = ('instant_sorcery', sum), 
-    total_planeswalkers = ('planeswalkers', sum), 
-    total_lands = ('nonland_spell', total_land),
-    total_foils = ('foil', sum), # total count of cards with foil prints
-    total_white = ('white', sum), 
-    total_blue = ('blue', sum), 
-    total_black = ('black', sum), 
-    total_red = ('red', sum), 
-    total_green = ('green', sum), 
-    average_edhrec_legendaries = ('edhrec_rank', 'mean'), 
-    highest_edhrec_legendaries = ('edhrec_rank', max), 
-    lowest_edhrec_legendaries = ('edhrec_rank', min)  
-)
+year_agg_nrp = tables['year_nrp']
 
 # edhrec rankings (excluding reprints)
-sns.set_style("dark", {'axes.grid' : True})
-plt.plot(year_agg_nrp.index, year_agg_nrp['average_edhrec_legendaries'], label = 'Average Rank')
-plt.plot(year_agg_nrp.index, year_agg_nrp['highest_edhrec_legendaries'], label = 'Highest Rank')
-plt.xlabel('Set Year')
-plt.ylabel('EDHREC Rank')
-plt.xlim(2010, 2023)
-plt.title('Current EDHREC Rank of Cards by Set Year (Highest and Average) - Reprints Excluded')
-plt.legend()
+figures.draw('edhrec_by_year_nrp', tables)
 plt.show()
 
 # non-land cmc averages (excluding reprints)
-sns.lineplot(data = year_agg_nrp, x = 'year', y = 'average_nonland_cmc')
-sns.set_style("dark", {'axes.grid' : False})
-plt.xlabel('Set Year')
-plt.ylabel('CMC')
-plt.title('Average CMC of Non-Land Spells by Set Year')
-plt.xticks(rotation = 45)
+figures.draw('average_cmc_by_year_nrp', tables)
+plt.show() 
+
+# the same from the oracle cards table (data_cleaning.py) - every card counted once, at its first printing 
+figures.draw('average_cmc_by_first_printing', tables)
 plt.show() 
 
 # plotting edhrec averages and total number of cards 
-plt.plot(year_agg_nrp.index, year_agg_nrp['total_cards'], label = 'Total Cards Printed')
-plt.plot(year_agg_nrp.index, year_agg_nrp['average_edhrec_legendaries'], label = 'Average EDHREC Rank')
-plt.xlabel('Set Year')
-plt.ylabel('Total Cards Released')
-plt.title('Total Cards Printed by Card Type and Set Year')
-plt.xlim(2015, 2023)
-plt.legend()
+figures.draw('cards_and_edhrec_nrp_recent', tables)
 plt.show()
 
 # plotting all cards printed 
-sns.lineplot(data = year_agg_nrp, x = 'year', y = 'total_cards')
-sns.set_style("dark", {'axes.grid' : False})
-plt.xlabel('Set Year')
-plt.ylabel('Total Cards Printed')
-plt.title('Cards Printed by Set Date, Excluding Reprints and Only Recent Years')
-plt.xlim(2015, 2023)
-plt.xticks(rotation = 45)
+figures.draw('cards_by_year_nrp_recent', tables)
 plt.show() 
 
 # plotting average edhrec 
-sns.lineplot(data = year_agg_nrp, x = 'year', y = 'average_edhrec_legendaries')
-sns.set_style("dark", {'axes.grid' : False})
-plt.xlabel('Set Year')
-plt.ylabel('EDHREC Rank')
-plt.title('Average EDHREC Rank by Set Date, Excluding Reprints and Only Recent Years')
-plt.xlim(2015, 2023)
-plt.xticks(rotation = 45)
+figures.draw('edhrec_average_nrp_recent', tables)
 plt.show() 
 
 
 
 
 
+##
+# cmc trends by keyword and oracle text function 
+##
+
+# one long card x label table from the keywords column and the functions tagged by data_cleaning.py, then 
+# every label's cmc by year and its cmc slope over release date in one groupby each (lands excluded) 
+card_functions = pd.read_feather('Data/card_functions.feather')
+labelled = cmc_trends.label_table(cards, card_functions)
+keyword_years = cmc_trends.cmc_distribution(labelled, by = 'year')
+keyword_slopes = cmc_trends.cmc_slopes(labelled)
+
+keyword_slopes.query('n_cards >= 100').sort_values(by = 'cmc_slope_per_year').head(20)
+
+# average cmc of the most printed keywords by year 
+figures.draw('keyword_cmc_by_year', tables)
+plt.show() 
+
+
+
+
+
+##
+# functionally similar cards (reprints and upgrades) 
+##
+
+# minhash/lsh index over the distinct oracle texts (card name as '~', numbers abstracted), so a lookup only 
+# compares against texts sharing a bucket - e.g. oracle_index.similar_to('shock') 
+oracle_index = oracle_similarity.OracleIndex(cards)
+oracle_index.similar_to_text('Lightning Bolt deals 3 damage to any target.', name = 'Lightning Bolt').head(20)
+
+
+
+
+
 
 
 
@@ -7,89 +7,42 @@ import pandas as pd
 import seaborn as sns 
 from matplotlib import pyplot as plt 
 
+import agg_cache 
+import agg_spec 
+import card_store 
+
 
 # enable show all columns for data check 
 pd.set_option('display.max_columns', None)
 
+# aggregation backend: 'pandas', or 'duckdb' to run the rollups as multi-threaded SQL over the store 
+backend = 'pandas'
+
 
 # pulling card data 
-cards = pd.read_feather('Data/cards_cleaned.feather')
+cards = card_store.read_store('Data/cards_cleaned')
 cards.info()
 
 
 
 ##
-# making temporary binary feature for aggregation
-##
-
-# card types binaries 
-cards['nonland_spell'] = cards['type_line'].str.contains('land') == False 
-cards['creature'] = cards['type_line'].str.contains('creature')
-cards['enchantment'] = cards['type_line'].str.contains('enchantment') 
-cards['artifact'] = cards['type_line'].str.contains('artifact') 
-cards['instant_sorcery'] = cards['type_line'].str.contains('instant|sorcery') 
-cards['planeswalkers'] = cards['type_line'].str.contains('planeswalk')
-
-# card color binaries 
-cards['blue'] = cards['colors'].str.contains('u') 
-cards['black'] = cards['colors'].str.contains('b')
-cards['white'] = cards['colors'].str.contains('w')
-cards['green']= cards['colors'].str.contains('g')
-cards['red'] = cards['colors'].str.contains('r')
-
-
-
-
-
-##
-# aggregating into a set-level table using conditional functions and agg 
+# aggregating into set- and year-level tables from the shared metric spec (agg_spec.py) 
 ## 
 
-# conditional function for total non-reprints (sum of bool is a count)
-def total_non_reprints(x): 
-    return(sum(x == False))
-
-# conditional function for total non-land cards 
-def total_non_land(x): 
-    return(sum(x == True))
-
-# generating a set-level summary table 
-set_agg = cards.groupby('set').agg(
-    release_date = ('released_at', max), 
-    total_cards = ('name', 'nunique'), 
-    total_non_reprints = ('reprint', total_non_reprints), 
-    total_non_lands = ('nonland_spell', total_non_land),
-    average_nonland_cmc = ('cmc', 'mean'),  # need logic to define non-land 
-    highest_nonland_cmc = ('cmc', max), 
-    total_creatures = ('creature', sum), 
-    total_enchantments = ('enchantment', sum), 
-    total_artifacts = ('artifact', sum), 
-    total_instant_sorceries = ('instant_sorcery', sum), 
-    total_planeswalkers = ('planeswalkers', sum), 
-    total_foils = ('foil', sum), # total count of cards with foil prints
-    total_white = ('white', sum), 
-    total_blue = ('blue', sum), 
-    total_black = ('black', sum), 
-    total_red = ('red', sum), 
-    total_green = ('green', sum), 
-    average_edhrec_legendaries = ('edhrec_rank', 'mean'), 
-    highest_edhrec_legendaries = ('edhrec_rank', max), 
-    lowest_edhrec_legendaries = ('edhrec_rank', min)  
-)
+# card type and color binaries (creature, nonland_spell, blue, ...) are precomputed by data_cleaning.py 
+# every table is rolled up from a single aggregation at the finest grain the requested tables share, and 
+# cached on disk (Data/agg_cache) until the cleaned store or the metric spec changes - only the columns the 
+# tables use are read 
+tables = agg_cache.cached_grains('Data/cards_cleaned', ['set', 'year'], backend = backend)
+
+# set-level summary table 
+set_agg = tables['set']
 
 set_agg.sort_values(by = 'release_date').head(10)
 
 
 # secondary aggregation step to calculate % of totals 
-set_agg
-set_agg[['percent_creatures', 'percent_foils',
-         'percent_white', 'percent_blue', 'percent_black', 
-         'percent_green', 'percent_red']] =   [(set_agg['total_creatures'] / set_agg['total_cards']) * 100, 
-     (set_agg['total_foils'] / set_agg['total_cards']) * 100, 
-     (set_agg['total_white'] / set_agg['total_cards']) * 100, 
-     (set_agg['total_blue'] / set_agg['total_cards']) * 100, 
-     (set_agg['total_green'] / set_agg['total_cards']) * 100, 
-     (set_agg['total_red'] / set_agg['total_cards']) * 100]
+set_agg = agg_spec.add_percents(set_agg)
 
 
 
@@ -124,27 +77,7 @@ plt.show()
 # aggregating to a year-level 
 ##
 
-year_agg = cards.groupby('year').agg(
-    total_cards = ('name', 'nunique'), 
-    total_non_reprints = ('reprint', total_non_reprints), 
-    total_non_lands = ('nonland_spell', total_non_land),
-    average_nonland_cmc = ('cmc', 'mean'),  # need logic to define non-land 
-    highest_nonland_cmc = ('cmc', max), 
-    total_creatures = ('creature', sum), 
-    total_enchantments = ('enchantment', sum), 
-    total_artifacts = ('artifact', sum), 
-    total_instant_sorceries = ('instant_sorcery', sum), 
-    total_planeswalkers = ('planeswalkers', sum), 
-    total_foils = ('foil', sum), # total count of cards with foil prints
-    total_white = ('white', sum), 
-    total_blue = ('blue', sum), 
-    total_black = ('black', sum), 
-    total_red = ('red', sum), 
-    total_green = ('green', sum), 
-    average_edhrec_legendaries = ('edhrec_rank', 'mean'), 
-    highest_edhrec_legendaries = ('edhrec_rank', max), 
-    lowest_edhrec_legendaries = ('edhrec_rank', min)  
-)
+year_agg = tables['year']
 
 
 
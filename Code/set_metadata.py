@@ -0,0 +1,85 @@
+"""
+Set metadata: one row per set code (name, set type, release date, card count, parent set, digital, funny flag)
+built once from the pulled cards or Scryfall's sets endpoint, stored as Data/sets.feather
+Set exclusions and set-type groupings look codes up in this table instead of pattern-matching set codes
+"""
+
+# Documentation on Scryfall's Set Object:
+# https://scryfall.com/docs/api/sets
+
+import numpy as np
+import pandas as pd
+
+import instrument
+import scryfall_fetch
+
+
+# codes of the un-sets (joke sets) the analysis leaves out: unglued, unhinged, unstable, unsanctioned, unfinity
+unset_codes = ['ugl', 'unh', 'ust', 'und', 'unf']
+
+# columns of the sets table
+set_columns = ['code', 'name', 'set_type', 'released_at', 'card_count', 'parent_set_code', 'digital', 'funny']
+
+
+
+##
+# building the table
+##
+
+# sets table from the pulled cards - parent set and digital are only known from the sets endpoint
+@instrument.timed()
+def build_sets(cards):
+    sets = cards.groupby('set', observed = True).agg(name = ('set_name', 'first'), set_type = ('set_type', 'first'),
+                                                     released_at = ('released_at', 'min'), card_count = ('id', 'count'))
+    sets = sets.reset_index().rename(columns = {'set': 'code'})
+    sets['code'] = sets['code'].astype(pd.StringDtype('pyarrow'))
+    sets['released_at'] = pd.to_datetime(sets['released_at'])
+    sets['parent_set_code'] = pd.array([None] * len(sets), dtype = pd.StringDtype('pyarrow'))
+    sets['digital'] = pd.array([None] * len(sets), dtype = 'bool[pyarrow]')
+    return(finish_sets(sets))
+
+
+# sets table from Scryfall's /sets endpoint (every set, including ones with no pulled cards)
+def fetch_sets(base_url = None, session = None):
+    limiter = scryfall_fetch.RateLimiter(scryfall_fetch.default_requests_per_second)
+    session = session or scryfall_fetch.make_session(pool_size = 1)
+    payload = scryfall_fetch.fetch_page(session, limiter, (base_url or scryfall_fetch.api_url) + '/sets', {})
+    sets = pd.DataFrame(payload['data']).reindex(columns = set_columns[:-1])
+    sets = sets.astype({'code': 'string[pyarrow]', 'name': 'string[pyarrow]', 'card_count': 'int64[pyarrow]',
+                        'parent_set_code': 'string[pyarrow]', 'digital': 'bool[pyarrow]'})
+    sets['released_at'] = pd.to_datetime(sets['released_at'])
+    return(finish_sets(sets))
+
+
+# lower-cased codes and set types, the set type as a categorical, and the funny flag (joke and playtest sets)
+def finish_sets(sets):
+    sets['code'] = sets['code'].str.lower()
+    sets['set_type'] = sets['set_type'].astype(pd.StringDtype('pyarrow')).str.lower().astype('category')
+    sets['funny'] = (sets['set_type'] == 'funny').to_numpy(dtype = bool) | sets['code'].isin(unset_codes).to_numpy(dtype = bool)
+    return(sets[set_columns].sort_values(by = 'released_at', kind = 'stable').reset_index(drop = True))
+
+
+
+##
+# lookups
+##
+
+# codes to exclude: the un-sets, plus every funny set if funny is True, plus the sets whose parent set is
+# excluded (an un-set's token and promo sets, known when the table came from the sets endpoint)
+def excluded_codes(sets = None, funny = False):
+    codes = set(unset_codes)
+    if sets is None:
+        return(sorted(codes))
+    if funny:
+        codes |= set(sets.loc[sets['funny'], 'code'])
+    children = sets.loc[sets['parent_set_code'].isin(codes).to_numpy(dtype = bool, na_value = False), 'code']
+    return(sorted(codes | set(children)))
+
+
+# rows whose set code is one of `codes` - an exact lookup on the categorical's few categories, spread to the
+# rows through their integer codes (no per-row string matching)
+def in_sets(set_column, codes):
+    if isinstance(set_column.dtype, pd.CategoricalDtype):
+        hits = np.append(set_column.cat.categories.isin(codes), False) # code -1 (missing) -> False
+        return(pd.Series(hits[set_column.cat.codes.to_numpy()], index = set_column.index))
+    return(pd.Series(set_column.isin(codes).to_numpy(dtype = bool, na_value = False), index = set_column.index))
@@ -0,0 +1,113 @@
+"""
+Strictly-better creatures: finds each creature that improves on an earlier one - same colors, same or lower
+cmc, power and toughness at least as high, a superset of its keywords, better in at least one of those, and
+released later. Creatures are swept in release order against per-color, per-keyword-set fronts of the
+weakest earlier creatures, so each new creature is checked against a handful of fronts instead of every pair
+"""
+
+from bisect import bisect_right
+from itertools import combinations
+
+import pandas as pd
+
+import instrument
+
+
+# creatures with more keywords than this only have keyword subsets of up to this size checked
+max_keywords = 8
+
+
+
+##
+# fronts of the weakest earlier creatures
+##
+
+# earlier creatures sharing colors and a keyword set, keeping only the weakest: one that costs at least as
+# much with no more power or toughness than another makes that other redundant (whatever improves on the
+# stronger one improves on the weaker one too) - kept sorted by cmc, highest first
+class WeakestFront:
+
+    def __init__(self):
+        self.costs = []  # negated cmc, ascending
+        self.points = []  # (cmc, power, toughness, name)
+
+    # the first creature in the front the candidate is at least as good as (None if there is none)
+    # strict: the keyword set is a proper subset of the candidate's, so equal stats still improve
+    def dominated_by(self, cmc, power, toughness, strict):
+        for point in self.points[:bisect_right(self.costs, -cmc)]:
+            if point[1] <= power and point[2] <= toughness:
+                if strict or point[0] > cmc or point[1] < power or point[2] < toughness:
+                    return(point)
+        return(None)
+
+    def add(self, cmc, power, toughness, name):
+        for point in self.points:
+            if point[0] >= cmc and point[1] <= power and point[2] <= toughness:
+                return
+        keep = [point for point in self.points
+                if not (cmc >= point[0] and power <= point[1] and toughness <= point[2])]
+        keep.append((cmc, power, toughness, name))
+        keep.sort(key = lambda point: -point[0])
+        self.points = keep
+        self.costs = [-point[0] for point in keep]
+
+
+
+##
+# sweep
+##
+
+# keyword subsets of a creature's keyword set, including the set itself and the empty set
+def keyword_subsets(keywords):
+    keywords = tuple(sorted(keywords))[:max_keywords]
+    return([subset for size in range(len(keywords) + 1) for subset in combinations(keywords, size)])
+
+
+# the creatures of a cleaned card table, one row per name at its first printing, with numeric stats
+def first_printed_creatures(cards):
+    creatures = cards[cards['creature'].to_numpy(dtype = bool, na_value = False)]
+    creatures = creatures.dropna(subset = ['power', 'toughness', 'cmc'])
+    creatures = creatures.sort_values(by = 'released_at', kind = 'stable').drop_duplicates(subset = 'name')
+    return(creatures[['id', 'name', 'released_at', 'year', 'color_mask', 'cmc', 'power', 'toughness', 'keywords']])
+
+
+# every first-printed creature with the name of an earlier creature it is strictly better than (missing
+# when it improves on none); creatures released the same day are not compared with each other
+@instrument.timed()
+def find_upgrades(cards):
+    creatures = first_printed_creatures(cards).reset_index(drop = True)
+    fronts = {}
+    improves_on = [None] * len(creatures)
+
+    rows = zip(creatures['released_at'], creatures['color_mask'], creatures['cmc'].astype(float),
+               creatures['power'].astype(float), creatures['toughness'].astype(float),
+               creatures['keywords'], creatures['name'])
+    pending = []
+    last_date = None
+    for position, (released_at, mask, cmc, power, toughness, keywords, name) in enumerate(rows):
+        # a new release date: the previous day's creatures become earlier creatures
+        if released_at != last_date:
+            for subset_key, point in pending:
+                fronts.setdefault(subset_key, WeakestFront()).add(*point)
+            pending = []
+            last_date = released_at
+
+        own = tuple(sorted(set(keywords)))
+        for subset in keyword_subsets(own):
+            front = fronts.get((mask, subset))
+            if front is None:
+                continue
+            found = front.dominated_by(cmc, power, toughness, strict = len(subset) < len(own))
+            if found is not None:
+                improves_on[position] = found[3]
+                break
+        pending.append(((mask, own), (cmc, power, toughness, name)))
+
+    return(creatures.assign(improves_on = pd.array(improves_on, dtype = 'string[pyarrow]')))
+
+
+# bool per card row: the first printing of a creature that is strictly better than an earlier one
+# (a hashed isin - np.isin on the ids' object arrays compares them pairwise)
+def upgrade_flags(cards, upgrades):
+    ids = upgrades.loc[upgrades['improves_on'].notna(), 'id']
+    return(pd.Series(cards['id'].isin(ids).to_numpy(dtype = bool, na_value = False), index = cards.index))
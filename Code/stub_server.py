@@ -0,0 +1,78 @@
+"""
+Local stub of Scryfall's cards/search endpoint, serving canned page JSON for offline pulls
+Usage: python Code/stub_server.py <folder of page_1.json, page_2.json, ...> [port]
+"""
+
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+# builds a request handler serving `pages` (list of page payloads, page 1 first)
+# pages listed in fail_once answer 429 on their first request to exercise retry logic
+def make_handler(pages, fail_once = ()):
+    pending_failures = set(fail_once)
+    lock = threading.Lock()
+
+    class StubHandler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            page = int(parse_qs(parsed.query).get('page', ['1'])[0])
+
+            with lock:
+                fail = page in pending_failures
+                pending_failures.discard(page)
+
+            if parsed.path != '/cards/search' or not 1 <= page <= len(pages):
+                self.send_json(404, {'object': 'error', 'status': 404, 'code': 'not_found'})
+            elif fail:
+                self.send_json(429, {'object': 'error', 'status': 429}, {'Retry-After': '0'})
+            else:
+                self.send_json(200, pages[page - 1])
+
+        def send_json(self, status, payload, headers = None):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        # keep stub output quiet
+        def log_message(self, format, *args):
+            pass
+
+    return(StubHandler)
+
+
+# starts the stub on a background thread and returns (server, base_url) - port 0 picks a free port
+def serve_pages(pages, port = 0, fail_once = ()):
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(pages, fail_once))
+    thread = threading.Thread(target = server.serve_forever, daemon = True)
+    thread.start()
+    return(server, 'http://127.0.0.1:' + str(server.server_address[1]))
+
+
+# reads page_1.json, page_2.json, ... from a folder
+def load_pages(folder):
+    pages = []
+    while os.path.exists(os.path.join(folder, 'page_' + str(len(pages) + 1) + '.json')):
+        with open(os.path.join(folder, 'page_' + str(len(pages) + 1) + '.json')) as f:
+            pages.append(json.load(f))
+    return(pages)
+
+
+if __name__ == '__main__':
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else 8000
+    server, base_url = serve_pages(load_pages(sys.argv[1]), port = port)
+    print('Serving canned Scryfall pages at ' + base_url)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
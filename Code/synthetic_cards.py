@@ -0,0 +1,275 @@
+"""
+Synthetic Scryfall-shaped cards, search pages and pulled/cleaned card tables, for benchmarking the pipeline without the API
+make_scaled_table builds pulled tables of millions of printings column-wise, with roughly Scryfall's mix of card
+types, colors, mana values and reprints
+"""
+
+import random
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+import card_features
+import cleaning_steps
+import oracle_functions
+import strictly_better
+from card_schema import CardTableBuilder, pulled_schema, table_to_frame
+
+
+type_lines = ['Creature — Human Wizard', 'Creature — Elf Warrior', 'Legendary Creature — Dragon',
+              'Instant', 'Sorcery', 'Enchantment', 'Enchantment — Aura', 'Artifact',
+              'Artifact Creature — Golem', 'Legendary Planeswalker — Jace', 'Land', 'Basic Land — Island']
+colors = ['W', 'U', 'B', 'R', 'G']
+keywords = ['Flying', 'Trample', 'Haste', 'Vigilance', 'Deathtouch', 'Lifelink', 'Flash', 'Ward']
+oracle_texts = ['When this creature enters, draw a card.', 'Destroy target creature.',
+                'Counter target spell.', 'Target creature gets +2/+2 until end of turn.',
+                'Create a 1/1 white Soldier creature token.', 'You gain 3 life.',
+                '{T}: Add {G}.', 'Synthetic Card deals 3 damage to any target.', '']
+rarities = ['common', 'uncommon', 'rare', 'mythic']
+set_types = ['expansion', 'expansion', 'core', 'masters', 'commander', 'funny']
+sets = [('s' + str(n).zfill(3), 'Synthetic Set ' + str(n), set_types[n % len(set_types)]) for n in range(120)]
+
+
+# one card dictionary with the fields data_pull.py keeps plus the bulkier fields it drops
+def make_card(number, rng):
+    set_code, set_name, set_type = sets[number % len(sets)]
+    type_line = rng.choice(type_lines)
+    card_colors = sorted(rng.sample(colors, rng.choice([0, 1, 1, 1, 2, 3])))
+    creature = 'Creature' in type_line
+
+    card = {
+        'object': 'card',
+        'id': '%08x-0000-0000-0000-%012x' % (number, number),
+        'oracle_id': '%08x-1111-1111-1111-%012x' % (number, number),
+        'name': 'Synthetic Card ' + str(number),
+        'lang': 'en',
+        'released_at': '%d-%02d-%02d' % (1993 + number % 31, 1 + number % 12, 1 + number % 28),
+        'uri': 'https://api.scryfall.com/cards/' + str(number),
+        'layout': 'normal',
+        'image_uris': {size: 'https://cards.scryfall.io/' + size + '/' + str(number) + '.jpg'
+                       for size in ['small', 'normal', 'large', 'png', 'art_crop', 'border_crop']},
+        'mana_cost': '{' + str(rng.randint(0, 6)) + '}' + ''.join('{' + c + '}' for c in card_colors),
+        'cmc': float(rng.randint(0, 8)),
+        'type_line': type_line,
+        'oracle_text': rng.choice(oracle_texts).replace('Synthetic Card', 'Synthetic Card ' + str(number)),
+        'colors': card_colors,
+        'color_identity': card_colors,
+        'keywords': rng.sample(keywords, rng.randint(0, 2)),
+        'legalities': {fmt: rng.choice(['legal', 'not_legal'])
+                       for fmt in ['standard', 'pioneer', 'modern', 'legacy', 'vintage', 'commander']},
+        'foil': rng.random() < 0.7,
+        'nonfoil': True,
+        'reprint': rng.random() < 0.3,
+        'set': set_code,
+        'set_name': set_name,
+        'set_type': set_type,
+        'rarity': rng.choice(rarities),
+        'artist': 'Artist ' + str(number % 400),
+        'prices': {'usd': '%.2f' % rng.random(), 'usd_foil': None, 'eur': None, 'tix': None},
+    }
+
+    # scryfall leaves fields out entirely when they do not apply to a card
+    if creature:
+        card['power'] = str(rng.randint(0, 8))
+        card['toughness'] = str(rng.randint(1, 8))
+    if 'Planeswalker' in type_line:
+        card['loyalty'] = str(rng.randint(2, 6))
+    if rng.random() < 0.8:
+        card['edhrec_rank'] = rng.randint(1, 25000)
+    return(card)
+
+
+# n_pages search-result payloads shaped like cards/search responses (175 cards per page)
+def make_pages(n_pages = 150, page_size = 175, seed = 0):
+    rng = random.Random(seed)
+    total = n_pages * page_size
+    return([{'object': 'list', 'total_cards': total, 'has_more': page < n_pages - 1,
+             'data': [make_card(page * page_size + n, rng) for n in range(page_size)]}
+            for page in range(n_pages)])
+
+
+# a pulled card table of n_cards rows, shaped like Data/cards.feather
+def make_card_table(n_cards, seed = 0):
+    rng = random.Random(seed)
+    builder = CardTableBuilder()
+    builder.add_cards(make_card(number, rng) for number in range(n_cards))
+    return(builder.to_frame())
+
+
+# a cleaned card table of n_cards rows, shaped like Data/cards_cleaned (same steps as data_cleaning.py)
+def make_cleaned_table(n_cards, seed = 0):
+    cards = cleaning_steps.clean_cards(make_card_table(n_cards, seed = seed))
+    cards = card_features.add_features(cards)
+    cards['n_functions'] = oracle_functions.functions_per_card(cards, oracle_functions.tag_functions(cards))
+    cards['strictly_better'] = strictly_better.upgrade_flags(cards, strictly_better.find_upgrades(cards))
+    return(cards)
+
+
+
+##
+# scaled tables - column-wise, for 100k to 10M printings
+##
+
+# type line -> share of oracle cards, roughly Scryfall's
+type_line_weights = {
+    'Creature — Human Wizard': 0.14, 'Creature — Elf Warrior': 0.12, 'Creature — Zombie': 0.1,
+    'Legendary Creature — Dragon': 0.06, 'Artifact Creature — Golem': 0.04, 'Instant': 0.12, 'Sorcery': 0.11,
+    'Enchantment': 0.07, 'Enchantment — Aura': 0.03, 'Artifact': 0.07, 'Artifact — Equipment': 0.02,
+    'Legendary Planeswalker — Jace': 0.01, 'Land': 0.08, 'Basic Land — Island': 0.01,
+    'Creature — Goblin // Creature — Goblin Shaman': 0.02}
+
+# mana value 0..10 -> share of nonland cards
+cmc_weights = [0.02, 0.13, 0.22, 0.22, 0.17, 0.11, 0.06, 0.03, 0.02, 0.01, 0.01]
+
+# number of colors 0..5 -> share of colored-eligible cards
+color_count_weights = [0.06, 0.72, 0.17, 0.03, 0.01, 0.01]
+
+# rules-text clauses, joined one to three per card ('~' is the card's own name, as on Scryfall)
+oracle_clauses = ['When this creature enters, draw a card.', 'Destroy target creature.', 'Counter target spell.',
+                  'Target creature gets +2/+2 until end of turn.', 'Create a 1/1 white Soldier creature token.',
+                  'You gain 3 life.', '{T}: Add {G}.', '~ deals 3 damage to any target.', 'Flying',
+                  'Trample', 'Whenever ~ attacks, each opponent loses 1 life.', 'Scry 2.',
+                  'Search your library for a basic land card, put it onto the battlefield tapped, then shuffle.',
+                  'Return target creature card from your graveyard to your hand.', 'Exile target artifact.',
+                  'When ~ dies, create a Treasure token.', 'Put a +1/+1 counter on target creature.',
+                  'Each player discards a card.', 'Equipped creature gets +1/+1.', 'Enchant creature']
+rarity_weights = {'common': 0.4, 'uncommon': 0.3, 'rare': 0.22, 'mythic': 0.08}
+
+# each set_types entry's position among the distinct set types (the set_type dictionary)
+set_type_codes = np.array([list(dict.fromkeys(set_types)).index(set_type) for set_type in set_types], dtype = 'int32')
+
+
+# weighted choice of n indices
+def choose(rng, weights, n):
+    weights = np.asarray(weights, dtype = float)
+    return(rng.choice(len(weights), size = n, p = weights / weights.sum()))
+
+
+# arrow strings `prefix` + number
+def numbered(prefix, numbers):
+    return(pc.binary_join_element_wise(prefix, pc.cast(pa.array(numbers), pa.string()), ''))
+
+
+# indices of the type lines containing `word`
+def type_lines_with(word):
+    return([index for index, line in enumerate(type_line_weights) if word in line])
+
+
+# per oracle card attributes (numpy arrays indexed by oracle number), the same on every printing
+def make_oracle_cards(n_oracle, n_sets, seed):
+    rng = np.random.default_rng([seed, 0])
+    kind = choose(rng, list(type_line_weights.values()), n_oracle)
+    land = np.isin(kind, type_lines_with('Land'))
+    colorless = land | (kind == list(type_line_weights).index('Artifact'))
+    cmc = np.where(land, 0, choose(rng, cmc_weights, n_oracle))
+    n_colors = np.where(colorless, 0, choose(rng, color_count_weights, n_oracle))
+
+    # a color mask with n_colors bits set, uniformly among those masks
+    mask = np.zeros(n_oracle, dtype = 'int64')
+    pick = rng.random(n_oracle)
+    for count in range(6):
+        options = np.array([value for value in range(32) if bin(value).count('1') == count])
+        rows = n_colors == count
+        mask[rows] = options[(pick[rows] * len(options)).astype('int64')]
+
+    return({'kind': kind, 'land': land, 'creature': np.isin(kind, type_lines_with('Creature')),
+            'planeswalker': np.isin(kind, type_lines_with('Planeswalker')),
+            'cmc': cmc, 'mask': mask, 'generic': np.minimum(np.maximum(cmc - n_colors, 0), 10),
+            'text': rng.integers(0, 400, n_oracle), 'keywords': rng.integers(0, 10, n_oracle),
+            'power': np.clip(np.round(cmc + rng.normal(0, 1.2, n_oracle)), 0, 12).astype('int64'),
+            'toughness': np.clip(np.round(cmc + rng.normal(0.5, 1.2, n_oracle)), 1, 12).astype('int64'),
+            'star': rng.random(n_oracle) < 0.01, 'loyalty': rng.integers(3, 7, n_oracle),
+            'edhrec_rank': rng.permutation(n_oracle) + 1, 'unranked': rng.random(n_oracle) < 0.2,
+            'first_set': (rng.random(n_oracle) * n_sets * 0.9).astype('int64')})
+
+
+# value pools the printings take from by index: type lines, color lists, mana costs, rules texts, keyword lists
+def make_pools(seed):
+    rng = np.random.default_rng([seed, 1])
+    texts = [' '.join(oracle_clauses[i] for i in rng.choice(len(oracle_clauses), size = 1 + k % 3, replace = False))
+             for k in range(400)]
+    color_lists = [[color for bit, color in enumerate(colors) if mask >> bit & 1] for mask in range(32)]
+    return({'type_line': pa.array(list(type_line_weights)),
+            'colors': pa.array(color_lists, type = pa.list_(pa.string())),
+            'mana_cost': pa.array(['{' + str(generic) + '}' + ''.join('{' + color + '}' for color in color_list)
+                                   for generic in range(11) for color_list in color_lists]),
+            'oracle_text': pa.array(texts),
+            'keywords': pa.array([[], [], ['Flying'], ['Trample'], ['Haste'], ['Flying', 'Vigilance'], ['Deathtouch'],
+                                  ['Lifelink', 'Flying'], ['Flash'], ['Ward', 'Trample']], type = pa.list_(pa.string()))})
+
+
+# text of the numbers where `where` holds, missing elsewhere
+def text_where(where, numbers):
+    return(pc.if_else(pa.array(where), pc.cast(pa.array(numbers), pa.string()), pa.scalar(None, pa.string())))
+
+
+# printings [start, stop) as a record batch of the pulled schema: each is of a random oracle card, a reprint
+# (about two in three) in a set after the card's first set, otherwise in its first set
+def make_scaled_batch(start, stop, oracle_cards, pools, set_days, seed):
+    rng = np.random.default_rng([seed, 2, start])
+    n = stop - start
+    n_sets = len(set_days)
+    oracle = rng.integers(0, len(oracle_cards['kind']), n)
+    card = {name: values[oracle] for name, values in oracle_cards.items()}
+    reprint = rng.random(n) < 0.67
+    printing_set = np.where(reprint, card['first_set'] + (rng.random(n) * (n_sets - card['first_set'])).astype('int64'),
+                            card['first_set'])
+    card_colors = pools['colors'].take(pa.array(card['mask']))
+
+    columns = {
+        'id': numbered('synthetic-', np.arange(start, stop)),
+        'name': numbered('Synthetic Card ', oracle),
+        'released_at': pc.strftime(pa.array(set_days[printing_set] * 86400 + 725846400, pa.timestamp('s')),
+                                   format = '%Y-%m-%d'), # days after 1993-01-01
+        'mana_cost': pc.if_else(pa.array(card['land']), pa.scalar(None, pa.string()),
+                                pools['mana_cost'].take(pa.array(card['generic'] * 32 + card['mask']))),
+        'cmc': pa.array(card['cmc'].astype(float)),
+        'type_line': pools['type_line'].take(pa.array(card['kind'])),
+        'oracle_text': pools['oracle_text'].take(pa.array(card['text'])),
+        'power': pc.if_else(pa.array(card['star']), pa.scalar('*'), text_where(card['creature'], card['power'])),
+        'toughness': text_where(card['creature'], card['toughness']),
+        'colors': card_colors,
+        'color_identity': card_colors,
+        'keywords': pools['keywords'].take(pa.array(np.where(card['creature'], card['keywords'], 0))),
+        'foil': pa.array(rng.random(n) < 0.7),
+        'nonfoil': pa.array(rng.random(n) < 0.95),
+        'reprint': pa.array(reprint),
+        'set': pa.DictionaryArray.from_arrays(pa.array(printing_set.astype('int32')), numbered('s', np.arange(n_sets))),
+        'set_name': numbered('Synthetic Set ', printing_set),
+        'set_type': pa.DictionaryArray.from_arrays(pa.array(set_type_codes[printing_set % len(set_types)]),
+                                                   pa.array(list(dict.fromkeys(set_types)))),
+        'rarity': pa.DictionaryArray.from_arrays(pa.array(choose(rng, list(rarity_weights.values()), n).astype('int32')),
+                                                 pa.array(list(rarity_weights))),
+        'artist': numbered('Artist ', oracle % 2000),
+        'edhrec_rank': pa.array(card['edhrec_rank'], mask = card['unranked']),
+        'legalities.commander': pc.if_else(pa.array(rng.random(n) < 0.9), pa.scalar('legal'), pa.scalar('not_legal')),
+        'loyalty': text_where(card['planeswalker'], card['loyalty']),
+    }
+    # power stays missing on non-creatures even where the star flag is set
+    columns['power'] = pc.if_else(pa.array(card['creature']), columns['power'], pa.scalar(None, pa.string()))
+    return(pa.record_batch([columns[field.name].cast(field.type) for field in pulled_schema], schema = pulled_schema))
+
+
+# record batches of a scaled pulled table: n_cards printings of about n_cards / 3 oracle cards in about
+# n_cards / 250 sets, released 1993-2023 with more sets in later years
+def iter_scaled_batches(n_cards, seed = 0, batch_size = 1000000):
+    n_oracle = max(n_cards // 3, 1)
+    n_sets = max(n_cards // 250, 12)
+    set_days = np.sort(np.random.default_rng([seed, 3]).triangular(0, 11300, 11300, n_sets).astype('int64'))
+    oracle_cards = make_oracle_cards(n_oracle, n_sets, seed)
+    pools = make_pools(seed)
+    for start in range(0, n_cards, batch_size):
+        yield(make_scaled_batch(start, min(start + batch_size, n_cards), oracle_cards, pools, set_days, seed))
+
+
+# a scaled pulled card table as a frame, shaped like Data/cards.feather
+def make_scaled_table(n_cards, seed = 0):
+    return(table_to_frame(pa.Table.from_batches(iter_scaled_batches(n_cards, seed), schema = pulled_schema)))
+
+
+# writes a scaled pulled card table to a feather file batch by batch, without holding the whole table
+def write_scaled_table(path, n_cards, seed = 0):
+    with pa.ipc.new_file(path, pulled_schema) as writer:
+        for batch in iter_scaled_batches(n_cards, seed):
+            writer.write_batch(batch)
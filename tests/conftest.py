@@ -0,0 +1,21 @@
+"""
+pytest setup: the modules live as flat scripts in Code/, so put it on the import path
+Benchmarks (test_bench.py) run at the scales given with --scales, e.g. pytest tests/test_bench.py --scales 100k,1M
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Code'))
+
+
+def pytest_addoption(parser):
+    parser.addoption('--scales', default = '10k', help = 'comma-separated printings counts the benchmarks run at')
+
+
+# every test taking `scale` runs once per --scales entry, its module fixtures built once per scale
+def pytest_generate_tests(metafunc):
+    if 'scale' in metafunc.fixturenames:
+        import bench_suite
+        scales = [bench_suite.parse_scale(text.strip()) for text in metafunc.config.getoption('scales').split(',')]
+        metafunc.parametrize('scale', scales, ids = [str(scale) for scale in scales], scope = 'module')
@@ -0,0 +1,39 @@
+"""
+agg_spec.py: every grain rolled up from the shared partials matches a plain groupby of the cards at that grain
+"""
+
+import pandas as pd
+import pytest
+
+import agg_spec
+import synthetic_cards
+
+
+@pytest.fixture(scope = 'module')
+def cards():
+    cards = synthetic_cards.make_cleaned_table(5000)
+    cards.loc[cards.index[:300], 'set_type'] = None # missing keys are a group of their own
+    return(cards)
+
+
+# the grain computed directly: filter, then one groupby over the grain's keys with the registry's reductions
+def reference(cards, name):
+    keys, where, names = agg_spec.grains[name]
+    cards = cards.assign(**{column: derive(cards) for column, (_, derive) in agg_spec.derived_columns.items()})
+    if where is not None:
+        cards = cards[cards[where].to_numpy(dtype = bool, na_value = False)]
+    return(cards.groupby(keys, observed = True, dropna = False).agg(
+        **{metric: agg_spec.metrics[metric] for metric in names}))
+
+
+def test_grains_match_plain_groupby(cards):
+    tables = agg_spec.compute_grains(cards, list(agg_spec.grains))
+    for name, table in tables.items():
+        pd.testing.assert_frame_equal(table.sort_index(), reference(cards, name).sort_index(), check_dtype = False,
+                                      check_index_type = False, obj = name)
+
+
+def test_grain_independent_of_company(cards):
+    alone = agg_spec.compute_grains(cards, ['year'])['year']
+    together = agg_spec.compute_grains(cards, ['year', 'year_set_type', 'set_rarity'])['year']
+    pd.testing.assert_frame_equal(alone, together)
@@ -0,0 +1,38 @@
+"""
+bench_suite.py's steps as pytest-benchmark tests on synthetic pulled tables (synthetic_cards.make_scaled_table),
+one group per scale - store a baseline with --benchmark-save=NAME and compare against it with
+--benchmark-compare=NAME (--benchmark-compare-fail=mean:25% to fail on regressions)
+"""
+
+import functools
+
+import pytest
+
+import bench_suite
+import synthetic_cards
+
+pytest.importorskip('pytest_benchmark')
+
+
+# synthetic pulled table of n printings, built once per scale
+@pytest.fixture(scope = 'session')
+def make_scaled_table():
+    return(functools.lru_cache(maxsize = 1)(synthetic_cards.make_scaled_table))
+
+
+# what each step starts from: the state after every step before it, run once per scale
+@pytest.fixture(scope = 'module')
+def step_states(scale, make_scaled_table, tmp_path_factory):
+    state = {'cards': make_scaled_table(scale), 'path': str(tmp_path_factory.mktemp('bench') / 'cards.feather')}
+    states = {}
+    for name, step in bench_suite.steps.items():
+        states[name] = dict(state)
+        state.update(step(state))
+    return(states)
+
+
+@pytest.mark.parametrize('step', list(bench_suite.steps))
+def test_step(benchmark, scale, step, step_states):
+    benchmark.group = str(scale) + ' printings'
+    added = benchmark.pedantic(bench_suite.steps[step], args = (step_states[step],), rounds = 3, iterations = 1)
+    assert isinstance(added, dict)
@@ -0,0 +1,41 @@
+"""
+incremental_pull.py: a refresh merges by name into a one-printing store and by id into a store of every printing
+"""
+
+import pandas as pd
+
+import incremental_pull
+import synthetic_cards
+from card_schema import to_pulled_types
+
+
+# a delta re-pulling the first n cards under new printing ids
+def reprinted(cards, n):
+    delta = cards.head(n).copy()
+    delta['id'] = delta['id'].str.replace('-0000-', '-1111-', n = 1)
+    return(to_pulled_types(delta))
+
+
+def test_merge_by_name_replaces_old_printings():
+    existing = synthetic_cards.make_card_table(300)
+    merged = incremental_pull.merge_cards(existing, reprinted(existing, 20))
+    assert len(merged) == 300
+    assert merged['name'].is_unique
+    assert merged['id'].str.contains('-1111-').sum() == 20
+
+
+def test_merge_by_id_keeps_other_printings():
+    cards = synthetic_cards.make_card_table(300)
+    existing = to_pulled_types(pd.concat([cards, reprinted(cards, 100)], ignore_index = True))
+    delta = to_pulled_types(pd.concat([reprinted(cards, 10), synthetic_cards.make_card_table(310).tail(10)],
+                                      ignore_index = True))
+    assert incremental_pull.merge_key(existing) == 'id'
+    merged = incremental_pull.merge_cards(existing, delta)
+    assert len(merged) == 410
+    assert merged['id'].is_unique
+    assert incremental_pull.delta_summary(existing, delta)['updated_cards'] == 10
+
+
+def test_empty_delta():
+    existing = synthetic_cards.make_card_table(50)
+    assert incremental_pull.merge_cards(existing, existing.head(0)) is existing
@@ -0,0 +1,18 @@
+"""
+oracle_cards.py: printings collapse to one row per card at its first printing
+"""
+
+import pandas as pd
+
+from oracle_cards import collapse_printings
+
+
+def test_collapse_printings():
+    cards = pd.DataFrame({'id': ['a2', 'a1', 'b1', 'a3'], 'name': ['alpha', 'alpha', 'beta', 'alpha'],
+                          'set': ['m10', 'lea', 'm10', 'm11'],
+                          'released_at': pd.to_datetime(['2009-07-17', '1993-08-05', '2009-07-17', '2010-07-16'])})
+    oracle = collapse_printings(cards).set_index('name')
+    assert oracle.loc['alpha', 'id'] == 'a1'
+    assert oracle.loc['alpha', 'printings'] == 3
+    assert oracle.loc['alpha', 'last_released_at'] == pd.Timestamp('2010-07-16')
+    assert oracle.loc['beta', 'printings'] == 1
@@ -0,0 +1,55 @@
+"""
+oracle_functions.py: texts where one function's pattern used to swallow or shadow another
+"""
+
+import pandas as pd
+import pytest
+
+from oracle_functions import normalize_text, tag_functions, tag_text
+
+
+@pytest.mark.parametrize('name, text, labels', [
+    ('Fling Bolt', 'fling bolt deals damage equal to its power to target creature.', ['damage']),
+    ('Shock', 'shock deals 2 damage to any target.', ['damage']),
+    ('Ninja', 'ninja deals 3 combat damage to a player.', ['damage']),
+    ('Undo', 'return target creature to its owner\'s hand, then return a creature card from your graveyard to '
+             'your hand.', ['bounce', 'regrowth']),
+    ('Evacuation', 'return all creatures to their owners\' hands.', ['bounce']),
+    ('Gravedigger', 'when gravedigger enters, return target creature card from your graveyard to your hand.',
+     ['enters_trigger', 'regrowth']),
+    ('Rampant Growth', 'search your library for a basic land card, put that card onto the battlefield tapped, then '
+                       'shuffle.', ['ramp']),
+    ('Duo Search', 'search your library for a creature card and a land card, reveal them, put them into your '
+                   'hand, then shuffle.', ['ramp', 'tutor']),
+    ('Demonic Tutor', 'search your library for a card, put that card into your hand, then shuffle.', ['tutor']),
+    ('Raise', 'create a 2/2 black zombie creature token, then draw a card.', ['create_token', 'draw']),
+])
+def test_tag_text(name, text, labels):
+    assert sorted(tag_text(normalize_text(name.lower(), text))) == sorted(labels)
+
+
+@pytest.mark.parametrize('name, text, normalized', [
+    ('', 'destroy target creature.', 'destroy target creature.'),
+    ('fog', 'prevent all combat damage. fogs are ~ too.', 'prevent all combat damage. fogs are ~ too.'),
+    ('fire // ice', 'fire deals 2 damage divided as you choose.', '~ deals 2 damage divided as you choose.'),
+    ('ach! hans, run!', 'search for ach! hans, run!.', 'search for ~.'),
+])
+def test_normalize_text(name, text, normalized):
+    assert normalize_text(name, text) == normalized
+
+
+# names that are also rules words keep those words' functions, and a missing name changes nothing
+def test_tag_functions_names():
+    cards = pd.DataFrame({
+        'id': ['1', '2', '3', '4'],
+        'name': ['exile', 'sacrifice', None, 'llanowar elves'],
+        'oracle_text': ['exile target white attacking creature. you gain life equal to its toughness.',
+                        'as an additional cost to cast this spell, sacrifice a creature. add an amount of {b} equal '
+                        'to the sacrificed creature\'s mana value.',
+                        'destroy target creature. draw a card.',
+                        'when llanowar elves enters, add {g}.'],
+    })
+    card_functions = tag_functions(cards)
+    found = card_functions.groupby('id')['function'].apply(lambda labels: sorted(map(str, labels))).to_dict()
+    assert found == {'1': ['exile'], '2': ['sacrifice'], '3': ['destroy', 'draw'],
+                     '4': ['enters_trigger', 'ramp']}
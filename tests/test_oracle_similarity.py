@@ -0,0 +1,27 @@
+"""
+oracle_similarity.py: looking up similar cards by rules text, with and without the card's name
+"""
+
+import pytest
+
+import synthetic_cards
+from oracle_similarity import OracleIndex, normalize
+
+
+@pytest.fixture(scope = 'module')
+def index():
+    return(OracleIndex(synthetic_cards.make_cleaned_table(2000)))
+
+
+def test_normalize_without_name():
+    assert normalize(None, 'Destroy target creature. Draw 2 cards.') == 'destroy target creature. draw # cards.'
+    assert normalize('', 'Destroy target creature.') == 'destroy target creature.'
+
+
+def test_similar_to_text_without_name(index):
+    assert len(index.similar_to_text('Destroy target creature.')) > 0
+
+
+def test_similar_to_text_with_name(index):
+    assert len(index.similar_to_text('Shock deals 2 damage to any target.', name = 'Shock')) == \
+           len(index.similar_to_text('Bolt deals 2 damage to any target.', name = 'Bolt'))
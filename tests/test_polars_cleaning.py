@@ -0,0 +1,23 @@
+"""
+polars_cleaning.py: the polars plan cleans a pull into the same frame as the pandas steps
+"""
+
+import pandas as pd
+import pytest
+
+import card_features
+import cleaning_steps
+import polars_cleaning
+import synthetic_cards
+from card_schema import read_cards
+
+pytest.importorskip('polars')
+
+
+def test_matches_pandas_steps(tmp_path):
+    path = str(tmp_path / 'cards.feather')
+    synthetic_cards.make_card_table(3000).to_feather(path)
+    pandas_cards = card_features.add_features(cleaning_steps.clean_cards(read_cards(path), ['s005', 's011']))
+    polars_cards = polars_cleaning.clean_cards(path, ['s005', 's011'])
+    assert not pandas_cards['set'].isin(['s005', 's011']).any()
+    pd.testing.assert_frame_equal(pandas_cards, polars_cards)
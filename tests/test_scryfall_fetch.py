@@ -0,0 +1,48 @@
+"""
+scryfall_fetch.py: paging the stub server (stub_server.py) offline, through its 429s, and reading Retry-After
+"""
+
+import time
+from email.utils import formatdate
+
+import pytest
+
+import scryfall_fetch
+import stub_server
+import synthetic_cards
+
+
+@pytest.fixture
+def stub():
+    def serve(pages, fail_once = ()):
+        server, base_url = stub_server.serve_pages(pages, fail_once = fail_once)
+        servers.append(server)
+        return(base_url)
+    servers = []
+    yield serve
+    for server in servers:
+        server.shutdown()
+
+
+def test_pages_through_429s(stub):
+    pages = synthetic_cards.make_pages(n_pages = 4, page_size = 20)
+    base_url = stub(pages, fail_once = (1, 3))
+    fetched = list(scryfall_fetch.iter_search_pages('cmc>=0', base_url = base_url, requests_per_second = 1000))
+    assert [page for page, _ in fetched] == [1, 2, 3, 4]
+    assert [card['id'] for _, data in fetched for card in data['data']] == \
+           [card['id'] for page in pages for card in page['data']]
+
+
+def test_no_matches(stub):
+    base_url = stub([])
+    assert list(scryfall_fetch.iter_search_pages('cmc>=0', base_url = base_url)) == []
+
+
+@pytest.mark.parametrize('retry_after, expected', [(None, 1.5), ('2', 2.0), ('-3', 0.0), ('soon', 1.5),
+                                                   (formatdate(0, usegmt = True), 0.0)])
+def test_retry_delay(retry_after, expected):
+    assert scryfall_fetch.retry_delay(retry_after, 1.5) == expected
+
+
+def test_retry_delay_http_date():
+    assert 50 < scryfall_fetch.retry_delay(formatdate(time.time() + 60, usegmt = True), 1.5) <= 60
@@ -0,0 +1,27 @@
+"""
+sql_backend.py: the duckdb grains match the pandas engine's over the same store
+"""
+
+import pandas as pd
+import pytest
+
+import agg_spec
+import card_store
+import sql_backend
+import synthetic_cards
+
+pytest.importorskip('duckdb')
+
+grain_names = ['set', 'year', 'year_nrp', 'year_set_type']
+
+
+def test_matches_pandas_engine(tmp_path):
+    path = str(tmp_path / 'cards_cleaned')
+    cards = synthetic_cards.make_cleaned_table(3000)
+    cards.loc[cards.index[:200], 'set_type'] = None # a NULL group in both engines
+    card_store.write_store(cards, path)
+    expected = agg_spec.compute_grains(card_store.read_store(path, columns = agg_spec.needed_columns(grain_names)),
+                                       grain_names)
+    tables = sql_backend.compute_grains(path, grain_names)
+    for grain in grain_names:
+        pd.testing.assert_frame_equal(expected[grain].sort_index(), tables[grain])